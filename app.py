@@ -1,14 +1,15 @@
 import streamlit as st
-from database import load_users
 from login_page import show_login_page
 from signup_page import show_signup_page
 from dashboard_page import show_dashboard_page
-from models import create_tables
+from migrations import ensure_schema
+import instrumentation
 from dotenv import load_dotenv
 
 load_dotenv()
 
-create_tables()
+# Checks the schema version once per process; Streamlit reruns skip it
+ensure_schema()
 
 # Page configuration
 st.set_page_config(page_title="MyBank", layout="wide")
@@ -22,14 +23,15 @@ if 'page' not in st.session_state:
     st.session_state.page = 'login'
 if 'signup_success' not in st.session_state:
     st.session_state.signup_success = False
-if 'users_db' not in st.session_state:
-    st.session_state.users_db = load_users()
+if 'user_id' not in st.session_state:
+    st.session_state.user_id = None
 
-# Page Routing
-if not st.session_state.logged_in:
-    if st.session_state.page == 'login':
-        show_login_page()
-    elif st.session_state.page == 'signup':
-        show_signup_page()
-else:
-    show_dashboard_page()
\ No newline at end of file
+# Page Routing (timed per rerun when INSTRUMENT=1)
+with instrumentation.rerun('dashboard' if st.session_state.logged_in else st.session_state.page):
+    if not st.session_state.logged_in:
+        if st.session_state.page == 'login':
+            show_login_page()
+        elif st.session_state.page == 'signup':
+            show_signup_page()
+    else:
+        show_dashboard_page()
\ No newline at end of file
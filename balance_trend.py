@@ -0,0 +1,95 @@
+"""Month-by-month balance history computed from a user's transactions.
+
+The database returns one net amount per month (GROUP BY year, month). Those nets are
+cached per user together with the highest transaction id they cover, so later calls only
+aggregate transactions added since. The running balance is then a pandas cumsum, in
+integer cents, over a complete month index anchored on the current balance. Individual
+rows never reach Python.
+"""
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+from sqlalchemy import BigInteger, extract, func
+
+from database import get_db
+from money import to_cents
+from models import Transaction
+
+MAX_CACHED_USERS = 1024
+
+_cache = OrderedDict()  # user_id -> {'nets': {(year, month): net cents}, 'last_id': int}
+_lock = threading.Lock()
+
+
+def _monthly_nets(user_id, after_id):
+    db = get_db()
+    try:
+        year = extract('year', Transaction.date)
+        month = extract('month', Transaction.date)
+        # Summed as raw BIGINT cents rather than through Money's float conversion
+        net_cents = func.sum(Transaction.amount, type_=BigInteger)
+        rows = db.query(year, month, net_cents, func.max(Transaction.id)).filter(
+            Transaction.user_id == user_id,
+            Transaction.id > after_id
+        ).group_by(year, month).all()
+    finally:
+        db.close()
+    nets = {(int(y), int(m)): int(round(total or 0)) for y, m, total, _ in rows}
+    last_id = max((max_id for *_, max_id in rows), default=after_id)
+    return nets, last_id
+
+
+def get_monthly_nets(user_id):
+    """Net transaction amount in cents per (year, month), extended incrementally from the cache."""
+    with _lock:
+        entry = _cache.get(user_id)
+        nets = dict(entry['nets']) if entry else {}
+        after_id = entry['last_id'] if entry else 0
+
+    new_nets, last_id = _monthly_nets(user_id, after_id)
+    for key, net in new_nets.items():
+        nets[key] = nets.get(key, 0) + net
+
+    with _lock:
+        # Concurrent callers each extend a consistent base; keep whichever covers more
+        current = _cache.get(user_id)
+        if current is None or current['last_id'] <= last_id:
+            _cache[user_id] = {'nets': nets, 'last_id': last_id}
+        if user_id in _cache:
+            _cache.move_to_end(user_id)
+        while len(_cache) > MAX_CACHED_USERS:
+            _cache.popitem(last=False)
+    return nets
+
+
+def invalidate(user_id):
+    with _lock:
+        _cache.pop(user_id, None)
+
+
+def monthly_balance_series(user_id, current_balance, months=None):
+    """End-of-month balances as a Series indexed by month start, oldest first.
+
+    The balance before the first transaction (e.g. the opening deposit) is inferred as
+    ``current_balance`` minus the sum of all transactions, so the last point always
+    equals ``current_balance``. ``months`` limits the result to the most recent N months
+    (the current month included).
+    """
+    nets = get_monthly_nets(user_id)
+    this_month = pd.Timestamp.today().to_period('M')
+    if not nets:
+        return pd.Series([current_balance], index=[this_month.to_timestamp()], name='Balance')
+
+    periods = pd.PeriodIndex([pd.Period(year=y, month=m, freq='M') for y, m in nets], freq='M')
+    monthly = pd.Series(list(nets.values()), index=periods, dtype='int64').groupby(level=0).sum()
+    full_range = pd.period_range(min(monthly.index.min(), this_month), max(monthly.index.max(), this_month), freq='M')
+    monthly = monthly.reindex(full_range, fill_value=0)
+
+    opening = to_cents(current_balance) - int(monthly.sum())
+    balances = (opening + monthly.cumsum()) / 100
+    if months:
+        balances = balances.iloc[-months:]
+    balances.index = balances.index.to_timestamp()
+    balances.name = 'Balance'
+    return balances
@@ -0,0 +1,91 @@
+"""Hammer one account with concurrent add_transaction calls and check the final balance.
+
+Usage:
+    python benchmarks/balance_contention.py [--threads 16] [--per-thread 200] [--amount 1.25]
+
+Runs against DATABASE_URL when set (point it at a scratch Postgres database), otherwise
+against a throwaway SQLite file. Exits non-zero if any committed credit was lost.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--per-thread", type=int, default=200)
+    parser.add_argument("--amount", type=float, default=1.25)
+    args = parser.parse_args()
+
+    if not os.getenv("DATABASE_URL"):
+        scratch = tempfile.mkdtemp(prefix="financetracker-bench-")
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(scratch, 'bench.db')}"
+
+    # Imported after DATABASE_URL is settled, since models builds the engine at import time
+    import migrations
+    import models
+    from database import add_transaction_for_user, get_db
+    from models import User, Transaction
+    from sqlalchemy import func
+
+    migrations.migrate()
+    db = get_db()
+    try:
+        user = User(email=f"contention-{time.time_ns()}@example.com", full_name="Contention Bench", balance=0.0, budget={})
+        db.add(user)
+        db.commit()
+        user_id = user.id
+    finally:
+        db.close()
+
+    transaction_data = {'date': '2025-01-01', 'description': 'bench credit', 'amount': args.amount, 'type': 'credit'}
+    committed = [0] * args.threads
+    start_barrier = threading.Barrier(args.threads)
+
+    def worker(index):
+        start_barrier.wait()
+        for _ in range(args.per_thread):
+            row, _ = add_transaction_for_user(user_id, transaction_data)
+            if row:
+                committed[index] += 1
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(args.threads)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    db = get_db()
+    try:
+        balance = db.query(User.balance).filter(User.id == user_id).scalar()
+        ledger_total = db.query(func.coalesce(func.sum(Transaction.amount), 0.0)).filter(Transaction.user_id == user_id).scalar()
+    finally:
+        db.close()
+
+    attempted = args.threads * args.per_thread
+    successes = sum(committed)
+    expected = successes * args.amount
+    print(f"database:    {models.engine.url.render_as_string(hide_password=True)}")
+    print(f"threads:     {args.threads} x {args.per_thread} = {attempted} credits of {args.amount}")
+    print(f"committed:   {successes} ({attempted - successes} failed)")
+    print(f"elapsed:     {elapsed:.2f}s ({successes / elapsed:,.0f} tx/s)")
+    print(f"balance:     {balance} (expected {expected}, ledger {ledger_total})")
+
+    if balance != expected or ledger_total != expected:
+        print("FAIL: balance does not match committed credits")
+        return 1
+    print("OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+"""Report what each entry point costs to import, from ``python -X importtime``.
+
+Usage:
+    python benchmarks/import_time.py [--top 10] [--max-ms MS] [module ...]
+
+Each module is imported in a fresh interpreter (so nothing is already cached) and the
+cumulative time of every top-level import is summed. Defaults to the login path and each
+dashboard section. With --max-ms, exits non-zero if any module takes longer, and fails
+if the login path imports pandas or matplotlib at all.
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_MODULES = [
+    "app_imports",
+    "sections.home",
+    "sections.transactions",
+    "sections.analysis",
+    "sections.expenses",
+    "sections.debts",
+    "sections.investments",
+    "sections.budget",
+]
+# Everything app.py imports before the login page renders
+APP_IMPORTS = "import login_page, signup_page, dashboard_page, migrations"
+# Heavy libraries the login page must not pull in
+LOGIN_FORBIDDEN = ("pandas", "matplotlib")
+
+
+def measure(module):
+    """(total_seconds, {module_name: cumulative_seconds}) for importing ``module`` cold."""
+    statement = APP_IMPORTS if module == "app_imports" else f"import {module}"
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    env.setdefault("DATABASE_URL", "sqlite://")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=ROOT, env=env, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"importing {module} failed:\n{result.stderr[-2000:]}")
+
+    cumulative = {}
+    total_us = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = len(name) - len(name.lstrip())
+        cumulative[name.strip()] = int(cumulative_us) / 1e6
+        # Top-level imports (one space of indent) account for everything beneath them
+        if depth == 1:
+            total_us += int(cumulative_us)
+    return total_us / 1e6, cumulative
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument("--top", type=int, default=5, help="heaviest imports to list per module")
+    parser.add_argument("--max-ms", type=float, help="fail if any module takes longer than this")
+    args = parser.parse_args()
+
+    failed = False
+    for module in args.modules:
+        total, cumulative = measure(module)
+        heaviest = sorted(
+            ((name, seconds) for name, seconds in cumulative.items() if "." not in name),
+            key=lambda item: item[1], reverse=True,
+        )[:args.top]
+        print(f"{module:<24} {total * 1000:8.1f} ms")
+        for name, seconds in heaviest:
+            print(f"    {name:<20} {seconds * 1000:8.1f} ms")
+
+        if args.max_ms is not None and total * 1000 > args.max_ms:
+            print(f"FAIL: {module} exceeds {args.max_ms:.0f} ms")
+            failed = True
+        if module == "app_imports":
+            leaked = [name for name in LOGIN_FORBIDDEN if name in cumulative]
+            if leaked:
+                print(f"FAIL: login path imports {', '.join(leaked)}")
+                failed = True
+
+    if failed:
+        return 1
+    print("OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+"""Login latency under a burst of concurrent attempts, and what it costs other sessions.
+
+Usage:
+    python benchmarks/login_latency.py [--threads 32] [--per-thread 10] [--bad-ratio 0.5]
+                                       [--max-p99-ms MS]
+
+Seeds one synthetic user per thread (benchmarks/synthetic_data.py), then every thread
+logs in repeatedly, with a wrong password for ``--bad-ratio`` of the attempts. Throttling
+is switched off so every attempt reaches the password check. Meanwhile a "bystander"
+thread keeps reading its cached snapshot with get_user, standing in for other sessions'
+reruns. Reports p50/p95/p99 of both (for logins that got checked), attempts refused
+because the password pool was saturated, and throughput. Try PASSWORD_HASH_WORKERS /
+PASSWORD_HASH_MAX_PENDING to compare pool sizes. Exits non-zero if --max-p99-ms is given and login p99 exceeds it.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def _percentile(timings, p):
+    timings = sorted(timings)
+    return timings[min(len(timings) - 1, int(len(timings) * p / 100))] * 1000 if timings else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--per-thread", type=int, default=10)
+    parser.add_argument("--bad-ratio", type=float, default=0.5)
+    parser.add_argument("--max-p99-ms", type=float, help="fail if login p99 is above this")
+    args = parser.parse_args()
+
+    if not os.getenv("DATABASE_URL"):
+        scratch = tempfile.mkdtemp(prefix="financetracker-bench-")
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(scratch, 'bench.db')}"
+    # Every attempt should reach the password check; throttling is measured elsewhere
+    os.environ["LOGIN_ATTEMPTS_PER_MINUTE"] = os.environ["LOGIN_IP_ATTEMPTS_PER_MINUTE"] = "1000000"
+
+    # Imported after the environment is settled, since models and throttle read it at import time
+    import migrations
+    import passwords
+    from database import get_user, login_user
+    from synthetic_data import PASSWORD, generate
+    from throttle import LoginThrottled
+
+    migrations.ensure_schema()
+    users = generate(users=args.threads + 1, transactions=10, expenses=5)
+    bystander_id = users[-1][0]
+    get_user(bystander_id)
+
+    login_timings = [[] for _ in range(args.threads)]
+    refused = [0] * args.threads
+    bystander_timings = []
+    done = threading.Event()
+    start_barrier = threading.Barrier(args.threads + 1)
+
+    def worker(index):
+        rng = random.Random(index)
+        email = users[index][1]
+        start_barrier.wait()
+        for _ in range(args.per_thread):
+            password = PASSWORD if rng.random() >= args.bad_ratio else "wrong-password"
+            started = time.perf_counter()
+            try:
+                login_user(email, password)
+            except LoginThrottled:
+                refused[index] += 1
+                continue
+            login_timings[index].append(time.perf_counter() - started)
+
+    def bystander():
+        start_barrier.wait()
+        while not done.is_set():
+            started = time.perf_counter()
+            get_user(bystander_id)
+            bystander_timings.append(time.perf_counter() - started)
+            time.sleep(0.001)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(args.threads)]
+    watcher = threading.Thread(target=bystander)
+    started = time.perf_counter()
+    watcher.start()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    done.set()
+    watcher.join()
+
+    timings = [t for per_thread in login_timings for t in per_thread]
+    print(f"hash method:   {passwords.HASH_METHOD}  workers {passwords.WORKERS}, max pending {passwords.MAX_PENDING}")
+    print(f"attempts:      {len(timings) + sum(refused)} from {args.threads} threads in {elapsed:.2f}s ({len(timings) / elapsed:.1f} checked/s)")
+    print(f"refused:       {sum(refused)} (password pool saturated)")
+    print(f"login ms:      p50 {_percentile(timings, 50):.1f}  p95 {_percentile(timings, 95):.1f}  p99 {_percentile(timings, 99):.1f}")
+    print(f"bystander ms:  p50 {_percentile(bystander_timings, 50):.2f}  p95 {_percentile(bystander_timings, 95):.2f}  p99 {_percentile(bystander_timings, 99):.2f}  ({len(bystander_timings)} reads)")
+    if args.max_p99_ms is not None and _percentile(timings, 99) > args.max_p99_ms:
+        print(f"FAIL: login p99 above {args.max_p99_ms} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,204 @@
+"""Time the database helpers, the expense aggregations and a headless render of each section.
+
+Usage:
+    python benchmarks/suite.py [--users 20] [--transactions 2000] [--repeat 20]
+                               [--only NAME] [--json results.json]
+                               [--baseline results.json] [--tolerance 1.3]
+
+Seeds a database with benchmarks/synthetic_data.py, then calls each case ``--repeat``
+times and reports the median, p95 and fastest call. Runs against DATABASE_URL when set
+(e.g. a local Postgres: DATABASE_URL=postgresql://localhost/financetracker_bench),
+otherwise against a throwaway SQLite file. Save a run with --json and pass it as
+--baseline to a later run. That run exits non-zero if any case's median is more than
+--tolerance times its baseline.
+"""
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Password checks are deliberately slow; time fewer of them
+SLOW_CASES = {'login_user': 5, 'signup_user': 5}
+
+
+def _render_section(menu):
+    # Runs inside AppTest as a standalone script, so it imports what it needs itself
+    import streamlit as st
+
+    from dashboard_page import load_section
+    from database import get_user
+
+    if menu == "Home":
+        from sections.home import render_home
+        render_home(get_user(st.session_state.user_id))
+    else:
+        load_section(menu)(st.session_state.current_user).render()
+
+
+def _run_app(app):
+    app.run()
+    if app.exception:
+        raise RuntimeError(f"render failed: {app.exception[0].message}")
+
+
+def build_cases(user_id, email, password):
+    import database
+    from dashboard_page import SECTIONS
+    from sections.common import aggregate_expenses, collapse_small_slices
+    from streamlit.testing.v1 import AppTest
+
+    snapshot = database.load_user(email)
+    # As row dicts, which aggregate_expenses takes; enough rows for the aggregation to register
+    expenses = [{'category': category, 'cost': cents / 100} for category, cents in zip(snapshot['expenses']['category'], snapshot['expenses']['cost_cents'])] * 50
+    created = {'expenses': [], 'debts': [], 'investments': []}
+
+    def add_expense(i):
+        row, _ = database.add_expense_for_user(user_id, {'name': f"Bench {time.time_ns()}", 'category': 'shopping', 'cost': 12.34})
+        created['expenses'].append(row['id'])
+
+    def add_debt(i):
+        row = database.add_debt_for_user(user_id, {'name': f"Bench {i}", 'amount_owed': 1000.0, 'interest_rate': 5.0, 'monthly_pay': 50.0})
+        created['debts'].append(row['id'])
+
+    def add_investment(i):
+        row = database.add_investment_for_user(user_id, {'name': f"Bench {i}", 'amount': 500.0, 'risk_level': 'medium'})
+        created['investments'].append(row['id'])
+
+    adders = {'expenses': add_expense, 'debts': add_debt, 'investments': add_investment}
+
+    def rows_for(kind):
+        # Untimed setup for update/delete: make sure there are rows to work on
+        def setup(count):
+            while len(created[kind]) < count:
+                adders[kind](len(created[kind]))
+        return setup
+
+    # name -> function(call index), or (function, untimed setup(call count))
+    cases = {
+        'load_users': lambda i: database.load_users(),
+        'load_user': lambda i: database.load_user(email),
+        'get_user (cached)': lambda i: database.get_user(user_id),
+        'login_user': lambda i: database.login_user(email, password),
+        'signup_user': lambda i: database.signup_user({'email': f"bench-signup-{time.time_ns()}@example.com", 'password': password, 'full_name': "Bench Signup"}),
+        'user_exists': lambda i: database.user_exists(email),
+        'list_transactions': lambda i: database.list_transactions(user_id, limit=50),
+        'count_transactions': lambda i: database.count_transactions(user_id),
+        'get_expense_totals': lambda i: database.get_expense_totals(user_id),
+        'add_transaction_for_user': lambda i: database.add_transaction_for_user(user_id, {'date': '2025-01-01', 'description': 'bench', 'amount': 1.0, 'type': 'credit'}),
+        'add_expense_for_user': add_expense,
+        'update_expense_for_user': (lambda i: database.update_expense_for_user(user_id, created['expenses'][i], {'name': f"Bench {i}", 'category': 'shopping', 'cost': 23.45}), rows_for('expenses')),
+        'delete_expense_for_user': (lambda i: database.delete_expense_for_user(user_id, created['expenses'].pop()), rows_for('expenses')),
+        'add_debt_for_user': add_debt,
+        'update_debt_for_user': (lambda i: database.update_debt_for_user(user_id, created['debts'][i], {'name': f"Bench {i}", 'amount_owed': 900.0, 'interest_rate': 5.0, 'monthly_pay': 50.0}), rows_for('debts')),
+        'delete_debt_for_user': (lambda i: database.delete_debt_for_user(user_id, created['debts'].pop()), rows_for('debts')),
+        'add_investment_for_user': add_investment,
+        'update_investment_for_user': (lambda i: database.update_investment_for_user(user_id, created['investments'][i], {'name': f"Bench {i}", 'amount': 600.0, 'risk_level': 'high'}), rows_for('investments')),
+        'delete_investment_for_user': (lambda i: database.delete_investment_for_user(user_id, created['investments'].pop()), rows_for('investments')),
+        'update_user_budget_for_user': lambda i: database.update_user_budget_for_user(user_id, {'groceries': 400.0 + i}),
+        # One untimed call first, so the timings don't include importing NumPy
+        'aggregate_expenses': (lambda i: aggregate_expenses(expenses), lambda count: aggregate_expenses(expenses)),
+        'collapse_small_slices': (lambda i: collapse_small_slices(snapshot['expense_totals']), lambda count: collapse_small_slices(snapshot['expense_totals'])),
+    }
+
+    for menu in ["Home", *SECTIONS]:
+        app = AppTest.from_function(_render_section, args=(menu,), default_timeout=120)
+        app.session_state['user_id'] = user_id
+        app.session_state['current_user'] = email
+        # Setup renders once untimed: the first run imports the section's modules
+        cases[f"render {menu}"] = (lambda i, app=app: _run_app(app), lambda count, app=app: _run_app(app))
+    return cases
+
+
+def measure(case, repeat):
+    fn, setup = case if isinstance(case, tuple) else (case, None)
+    if setup:
+        setup(repeat)
+    timings = []
+    for i in range(repeat):
+        started = time.perf_counter()
+        fn(i)
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    return {
+        'calls': repeat,
+        'median_ms': statistics.median(timings) * 1000,
+        'p95_ms': timings[min(len(timings) - 1, int(len(timings) * 0.95))] * 1000,
+        'min_ms': timings[0] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--transactions", type=int, default=2000, help="per user")
+    parser.add_argument("--expenses", type=int, default=30, help="per user")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--only", help="run only cases whose name contains this")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--baseline", help="compare against results saved with --json")
+    parser.add_argument("--tolerance", type=float, default=1.3)
+    args = parser.parse_args()
+
+    if not os.getenv("DATABASE_URL"):
+        scratch = tempfile.mkdtemp(prefix="financetracker-bench-")
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(scratch, 'bench.db')}"
+
+    # The login case repeats one email; keep the attempt throttle out of the timings
+    os.environ.setdefault("LOGIN_ATTEMPTS_PER_MINUTE", "1000000")
+
+    # Streamlit warns about the missing script context whenever it's used outside a run
+    logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").setLevel(logging.ERROR)
+
+    # Imported after DATABASE_URL is settled, since models builds the engine at import time
+    import migrations
+    import models
+    from synthetic_data import PASSWORD, generate
+
+    migrations.ensure_schema()
+    started = time.perf_counter()
+    created = generate(users=args.users, transactions=args.transactions, expenses=args.expenses)
+    print(f"database:    {models.engine.url.render_as_string(hide_password=True)}")
+    print(f"seeded:      {args.users} users x {args.transactions} transactions in {time.perf_counter() - started:.2f}s")
+    print()
+
+    user_id, email = created[0]
+    cases = build_cases(user_id, email, PASSWORD)
+    results = {}
+    print(f"{'case':<32} {'calls':>5} {'median ms':>10} {'p95 ms':>10} {'min ms':>10}")
+    for name, case in cases.items():
+        if args.only and args.only not in name:
+            continue
+        results[name] = measure(case, SLOW_CASES.get(name, args.repeat))
+        r = results[name]
+        print(f"{name:<32} {r['calls']:>5} {r['median_ms']:>10.2f} {r['p95_ms']:>10.2f} {r['min_ms']:>10.2f}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'database': models.engine.dialect.name, 'results': results}, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+        regressions = [
+            (name, baseline[name]['median_ms'], r['median_ms'])
+            for name, r in results.items()
+            if name in baseline and r['median_ms'] > baseline[name]['median_ms'] * args.tolerance
+        ]
+        print()
+        for name, before, after in regressions:
+            print(f"REGRESSION: {name} {before:.2f} ms -> {after:.2f} ms")
+        if regressions:
+            return 1
+        print(f"OK: no case slower than {args.tolerance}x baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
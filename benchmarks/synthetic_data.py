@@ -0,0 +1,142 @@
+"""Generate synthetic users with transactions, expenses, debts and investments.
+
+Usage:
+    python benchmarks/synthetic_data.py [--users 100] [--transactions 500] [--expenses 20]
+                                        [--debts 3] [--investments 5] [--seed 0]
+
+Writes to DATABASE_URL (or the app's default SQLite file) with executemany bulk inserts,
+in chunks. Every generated user has the password ``PASSWORD`` and an email like
+``bench-<run>-<n>@example.com``. The opening balance plus the transactions equal the
+stored balance, as they would for real accounts.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+PASSWORD = "bench-password"
+CHUNK_SIZE = 10000
+CATEGORIES = ['groceries', 'rent', 'utilities', 'transportation', 'entertainment', 'healthcare', 'dining out', 'shopping', 'subscriptions']
+RISK_LEVELS = ['low', 'medium', 'high']
+
+
+def _chunks(rows):
+    for start in range(0, len(rows), CHUNK_SIZE):
+        yield rows[start:start + CHUNK_SIZE]
+
+
+def generate(users=100, transactions=500, expenses=20, debts=3, investments=5, seed=0):
+    """Insert the synthetic data; returns the new users' (id, email) pairs."""
+    # Imported here so DATABASE_URL can be set before models builds the engine
+    from sqlalchemy import bindparam, insert
+    from werkzeug.security import generate_password_hash
+
+    from models import Debt, Expense, Investment, Transaction, User, engine
+    from money import from_cents
+
+    rng = random.Random(seed)
+    run = f"{time.time_ns():x}"
+    # One hash for everyone: hashing is deliberately slow and would dominate generation
+    password_hash = generate_password_hash(PASSWORD)
+    today = date.today()
+
+    with engine.begin() as conn:
+        user_rows = [
+            {
+                'email': f"bench-{run}-{n}@example.com",
+                'password': password_hash,
+                'full_name': f"Bench User {n}",
+                'phone': f"555{n:07d}"[-10:],
+                'bank_name': "Bench Bank",
+                'account_number': f"{rng.randrange(10 ** 9, 10 ** 10)}",
+                'routing_number': "021000021",
+                'account_type': "Checking",
+                'balance': 0.0,
+            }
+            for n in range(users)
+        ]
+        created = conn.execute(insert(User).returning(User.id, User.email, sort_by_parameter_order=True), user_rows).all()
+
+        children = {Transaction: [], Expense: [], Debt: [], Investment: []}
+        balances = {}
+        for user_id, _ in created:
+            cents = rng.randint(100_000, 2_000_000)
+            for _ in range(transactions):
+                amount = rng.randint(-25_000, 30_000)
+                cents += amount
+                children[Transaction].append({
+                    'user_id': user_id,
+                    'date': today - timedelta(days=rng.randint(0, 3 * 365)),
+                    'description': rng.choice(["Payroll", "Grocery store", "Rent", "Coffee", "Transfer", "Utilities"]),
+                    'amount': from_cents(amount),
+                    'type': 'credit' if amount > 0 else 'debit',
+                    'notes': '',
+                })
+            balances[user_id] = from_cents(cents)
+            for j in range(expenses):
+                children[Expense].append({
+                    'user_id': user_id,
+                    'name': f"Expense {j}",
+                    'category': CATEGORIES[j % len(CATEGORIES)],
+                    'cost': from_cents(rng.randint(500, 50_000)),
+                    'date': today - timedelta(days=rng.randint(0, 365)),
+                })
+            for j in range(debts):
+                children[Debt].append({
+                    'user_id': user_id,
+                    'name': f"Debt {j}",
+                    'amount_owed': from_cents(rng.randint(50_000, 5_000_000)),
+                    'interest_rate': round(rng.uniform(0, 29.99), 2),
+                    'monthly_pay': from_cents(rng.randint(5_000, 60_000)),
+                })
+            for j in range(investments):
+                children[Investment].append({
+                    'user_id': user_id,
+                    'name': f"Fund {j}",
+                    'amount': from_cents(rng.randint(10_000, 2_000_000)),
+                    'risk_level': rng.choice(RISK_LEVELS),
+                    'symbol': None,
+                    'quantity': None,
+                })
+
+        for model, rows in children.items():
+            for chunk in _chunks(rows):
+                conn.execute(insert(model), chunk)
+        users_table = User.__table__
+        conn.execute(
+            users_table.update().where(users_table.c.id == bindparam('user_id')).values(balance=bindparam('new_balance')),
+            [{'user_id': user_id, 'new_balance': balance} for user_id, balance in balances.items()],
+        )
+    return [(user_id, email) for user_id, email in created]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--transactions", type=int, default=500, help="per user")
+    parser.add_argument("--expenses", type=int, default=20, help="per user")
+    parser.add_argument("--debts", type=int, default=3, help="per user")
+    parser.add_argument("--investments", type=int, default=5, help="per user")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    import migrations
+    migrations.ensure_schema()
+
+    started = time.perf_counter()
+    created = generate(args.users, args.transactions, args.expenses, args.debts, args.investments, args.seed)
+    elapsed = time.perf_counter() - started
+    rows = len(created) * (1 + args.transactions + args.expenses + args.debts + args.investments)
+    print(f"created {len(created)} users ({rows:,} rows) in {elapsed:.2f}s; password {PASSWORD!r}")
+    if created:
+        print(f"first user: {created[0][1]}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
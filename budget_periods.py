@@ -0,0 +1,119 @@
+"""Monthly budget vs actual, from dated expenses.
+
+Budgets are monthly amounts; a period is a calendar month, and a rolling window of N
+months ending with a period compares N times the budget with the spending in those
+months. Spending comes from one query per call, grouped by (year, month, category) over
+the months it still needs. Closed months (before the current one) are then kept per
+user, so a window only queries the current month plus any older months not seen yet.
+The expense mutators in ``database`` call ``invalidate`` with the month they touched,
+so an edit to a closed month is picked up on the next call.
+"""
+import threading
+from collections import OrderedDict
+from datetime import date, datetime
+
+from sqlalchemy import BigInteger, extract, func
+
+from models import Expense, SessionLocal
+from money import from_cents, to_cents
+
+WINDOWS = (1, 3, 6, 12)
+MAX_CACHED_USERS = 1024
+
+_cache = OrderedDict()  # user_id -> {(year, month): {category: cents}}, closed months only
+_generations = {}  # user_id -> invalidation count, so a slow query can't store stale months
+_lock = threading.Lock()
+
+
+def month_of(value=None):
+    """(year, month) of a date, a 'YYYY-MM-DD' string, or today."""
+    if value is None:
+        value = date.today()
+    elif isinstance(value, str):
+        value = datetime.strptime(value[:10], '%Y-%m-%d').date()
+    return value.year, value.month
+
+
+def months_ending(period, count):
+    """The ``count`` months up to and including ``period``, oldest first."""
+    year, month = period
+    index = year * 12 + month - 1 - (count - 1)
+    return [(i // 12, i % 12 + 1) for i in range(index, index + count)]
+
+
+def _month_start(period):
+    year, month = divmod(period[0] * 12 + period[1] - 1, 12)
+    return date(year, month + 1, 1)
+
+
+def _spending_by_month(user_id, first, last):
+    year = extract('year', Expense.date)
+    month = extract('month', Expense.date)
+    category = func.lower(func.trim(Expense.category))
+    db = SessionLocal()
+    try:
+        # Raw BIGINT cents, like balance_trend, rather than Money's float conversion
+        rows = db.query(year, month, category, func.sum(Expense.cost, type_=BigInteger)).filter(
+            Expense.user_id == user_id,
+            Expense.date >= _month_start(first),
+            Expense.date < _month_start((last[0], last[1] + 1)),
+            Expense.category.isnot(None),
+            category != ''
+        ).group_by(year, month, category).all()
+    finally:
+        db.close()
+    spending = {}
+    for y, m, name, cents in rows:
+        spending.setdefault((int(y), int(m)), {})[name] = int(round(cents or 0))
+    return spending
+
+
+def monthly_spending(user_id, months):
+    """Spending in cents per category for each of ``months``: {(year, month): {category: cents}}."""
+    current = month_of()
+    with _lock:
+        cached = _cache.get(user_id, {})
+        found = {period: cached[period] for period in months if period in cached}
+        generation = _generations.get(user_id, 0)
+    missing = [period for period in months if period not in found]
+    if not missing:
+        return found
+
+    fetched = _spending_by_month(user_id, min(missing), max(missing))
+    for period in missing:
+        found[period] = fetched.get(period, {})
+    closed = {period: found[period] for period in missing if period < current}
+    with _lock:
+        if closed and _generations.get(user_id, 0) == generation:
+            _cache.setdefault(user_id, {}).update(closed)
+            _cache.move_to_end(user_id)
+            while len(_cache) > MAX_CACHED_USERS:
+                _cache.popitem(last=False)
+    return found
+
+
+def invalidate(user_id, when=None):
+    """Forget the cached month containing ``when`` (a date or 'YYYY-MM-DD'), or all of the user's."""
+    with _lock:
+        _generations[user_id] = _generations.get(user_id, 0) + 1
+        if when is None:
+            _cache.pop(user_id, None)
+        elif user_id in _cache:
+            _cache[user_id].pop(month_of(when), None)
+
+
+def budget_vs_actual(user_id, budget, period=None, window=1):
+    """{category: (budgeted, actual)} over the ``window`` months ending with ``period``.
+
+    ``budget`` holds monthly amounts, so each is multiplied by ``window``. Categories
+    from either side are included; ``period`` defaults to the current month.
+    """
+    spending = monthly_spending(user_id, months_ending(period or month_of(), window))
+    actual = {}
+    for per_category in spending.values():
+        for category, cents in per_category.items():
+            actual[category] = actual.get(category, 0) + cents
+    return {
+        category: (from_cents(to_cents(budget.get(category, 0.0)) * window), from_cents(actual.get(category, 0)))
+        for category in sorted(set(budget) | set(actual))
+    }
@@ -1,24 +1,38 @@
+import importlib
 import streamlit as st
-from sections import (
-    render_home,
-    TransactionSection,
-    AnalysisSection,
-    ExpenseSection,
-    DebtSection,
-    InvestmentSection,
-    BudgetSection,
-)
+from database import get_user
+import instrumentation
+
+# Menu entry -> (module, class). A section's module (and its pandas/matplotlib imports)
+# is loaded only once that entry is selected; Python caches it for later reruns.
+SECTIONS = {
+    "Add Transaction": ("sections.transactions", "TransactionSection"),
+    "Analysis": ("sections.analysis", "AnalysisSection"),
+    "Expenses": ("sections.expenses", "ExpenseSection"),
+    "Debts": ("sections.debts", "DebtSection"),
+    "Investments": ("sections.investments", "InvestmentSection"),
+    "Budget": ("sections.budget", "BudgetSection"),
+}
+
+
+def load_section(menu):
+    module_name, class_name = SECTIONS[menu]
+    return getattr(importlib.import_module(module_name), class_name)
 
 
 def logout():
     st.session_state.logged_in = False
     st.session_state.current_user = None
+    st.session_state.user_id = None
     st.session_state.page = 'login'
 
 
 def show_dashboard_page():
     current_user_email = st.session_state.current_user
-    user = st.session_state.users_db[current_user_email]
+    user = get_user(st.session_state.user_id)
+    if user is None:
+        logout()
+        st.rerun()
 
     with st.sidebar:
         st.title("MyBank")
@@ -27,7 +41,7 @@ def show_dashboard_page():
 
         menu = st.radio(
             "Navigation",
-            ["Home", "Add Transaction", "Analysis", "Expenses", "Debts", "Investments", "Budget"],
+            ["Home", *SECTIONS],
             label_visibility="collapsed",
         )
 
@@ -39,15 +53,11 @@ def show_dashboard_page():
             logout()
             st.rerun()
 
-    sections = {
-        "Home": lambda: render_home(user),
-        "Add Transaction": TransactionSection(current_user_email).render,
-        "Analysis": AnalysisSection(current_user_email).render,
-        "Expenses": ExpenseSection(current_user_email).render,
-        "Debts": DebtSection(current_user_email).render,
-        "Investments": InvestmentSection(current_user_email).render,
-        "Budget": BudgetSection(current_user_email).render,
-    }
-
-    if menu in sections:
-        sections[menu]()
+    with instrumentation.section(menu):
+        if menu == "Home":
+            from sections.home import render_home
+            render_home(user)
+        elif menu in SECTIONS:
+            load_section(menu)(current_user_email).render()
+
+    instrumentation.render_debug_panel()
@@ -1,366 +1,726 @@
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy import func
-from models import SessionLocal, User, Transaction, Expense, Debt, Investment, create_tables
-from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy.orm import sessionmaker, selectinload, defer
+from sqlalchemy import func, select, insert, update, delete, tuple_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from models import MONTHLY, SessionLocal, User, Transaction, Expense, Debt, Investment, Budget
+from money import from_cents, to_cents
+from snapshot import BankDetails, UserSnapshot
+import budget_periods
+import ledger
+from user_cache import UserCache
+import instrumentation
+from datetime import date, datetime
+from passwords import PasswordPoolBusy, hash_password, needs_rehash, verify_password
+from throttle import LoginThrottled, login_throttle
+import os
 import re
-
+
 def get_db():
     return SessionLocal()
-
-# Validate email format
+
+# Snapshots shared by every session in this process; writes below keep entries current
+user_cache = UserCache.from_env()
+ASYNC_LOADS = os.getenv("DB_ASYNC", "") in ("1", "true")
+
+# Validate email format
 def validate_email(email):
     return re.match(r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$", email)
-
-# Load users (for compatibility, return dict)
+
+# Child collections load_users loads alongside each user (one extra SELECT ... IN per
+# collection). Snapshots read expenses, debts and investments into ledger frames instead.
+USER_CHILDREN = (
+    selectinload(User.expenses),
+    selectinload(User.debts),
+    selectinload(User.investments),
+    selectinload(User.budgets),
+)
+
+# Columns selected/RETURNed for each row type, and the row dicts built from them as stored in
+# a user's snapshot (also returned by the mutators below)
+TRANSACTION_COLUMNS = (Transaction.id, Transaction.date, Transaction.description, Transaction.amount, Transaction.type, Transaction.notes)
+EXPENSE_COLUMNS = (Expense.id, Expense.name, Expense.category, Expense.cost, Expense.date)
+DEBT_COLUMNS = (Debt.id, Debt.name, Debt.amount_owed, Debt.interest_rate, Debt.monthly_pay)
+INVESTMENT_COLUMNS = (Investment.id, Investment.name, Investment.amount, Investment.risk_level, Investment.symbol, Investment.quantity)
+
+def _transaction_row(transaction):
+    return {
+        'id': transaction.id,
+        'date': transaction.date.strftime('%Y-%m-%d'),
+        'description': transaction.description,
+        'amount': transaction.amount,
+        'type': transaction.type,
+        'notes': transaction.notes
+    }
+
+def _expense_row(expense):
+    return {
+        'id': expense.id,
+        'name': expense.name,
+        'category': expense.category,
+        'cost': expense.cost,
+        'date': expense.date.strftime('%Y-%m-%d') if expense.date else ''
+    }
+
+def _debt_row(debt):
+    return {
+        'id': debt.id,
+        'name': debt.name,
+        'amount_owed': debt.amount_owed,
+        'interest_rate': debt.interest_rate,
+        'monthly_pay': debt.monthly_pay
+    }
+
+def _investment_row(investment):
+    return {
+        'id': investment.id,
+        'name': investment.name,
+        'amount': investment.amount,
+        'risk_level': investment.risk_level,
+        'symbol': investment.symbol,
+        'quantity': investment.quantity
+    }
+
+
+def _symbol(value):
+    # Tickers are matched against the price feed case-insensitively; blank means untracked
+    return (value or '').strip().upper() or None
+
+# Scalar user columns as stored in a snapshot. The password hash and the full account and
+# routing numbers are left out: snapshots are shared by every session in the process and
+# nothing renders them, so get_bank_details reads them only when a page needs them.
+def _user_fields(user):
+    return {
+        'full_name': user.full_name,
+        'birth_date': user.birth_date.strftime('%Y-%m-%d') if user.birth_date else '',
+        'gender': user.gender,
+        'phone': user.phone,
+        'bank_name': user.bank_name,
+        'account_last4': (user.account_number or '')[-4:],
+        'account_type': user.account_type,
+        'balance': user.balance,
+    }
+
+def _monthly_budget(user):
+    return {budget.category: budget.amount for budget in user.budgets if budget.period == MONTHLY}
+
+def _serialize_user(user):
+    return {
+        **_user_fields(user),
+        'budget': _monthly_budget(user),
+        'expenses': [_expense_row(expense) for expense in user.expenses],
+        'debts': [_debt_row(debt) for debt in user.debts],
+        'investments': [_investment_row(investment) for investment in user.investments]
+    }
+
+# Load users (for compatibility, return dict); same fields as a snapshot, so no password hashes
 def load_users():
     db = get_db()
     try:
-        users = db.query(User).all()
-        users_by_email = {}
-        for user in users:
-            users_by_email[user.email] = {
-                'password': user.password,
-                'full_name': user.full_name,
-                'birth_date': user.birth_date.strftime('%Y-%m-%d') if user.birth_date else '',
-                'gender': user.gender,
-                'phone': user.phone,
-                'bank_name': user.bank_name,
-                'account_number': user.account_number,
-                'routing_number': user.routing_number,
-                'account_type': user.account_type,
-                'balance': user.balance,
-                'budget': user.budget or {},
-                'transactions': [
-                    {
-                        'id': transaction.id,
-                        'date': transaction.date.strftime('%Y-%m-%d'),
-                        'description': transaction.description,
-                        'amount': transaction.amount,
-                        'type': transaction.type,
-                        'notes': transaction.notes
-                    }
-                    for transaction in db.query(Transaction).filter(Transaction.user_id == user.id).all()
-                ],
-                'expenses': [
-                    {
-                        'id': expense.id,
-                        'name': expense.name,
-                        'category': expense.category,
-                        'cost': expense.cost
-                    }
-                    for expense in db.query(Expense).filter(Expense.user_id == user.id).all()
-                ],
-                'debts': [
-                    {
-                        'id': debt.id,
-                        'name': debt.name,
-                        'amount_owed': debt.amount_owed,
-                        'interest_rate': debt.interest_rate,
-                        'monthly_pay': debt.monthly_pay
-                    }
-                    for debt in db.query(Debt).filter(Debt.user_id == user.id).all()
-                ],
-                'investments': [
-                    {
-                        'id': investment.id,
-                        'name': investment.name,
-                        'amount': investment.amount,
-                        'risk_level': investment.risk_level
-                    }
-                    for investment in db.query(Investment).filter(Investment.user_id == user.id).all()
-                ]
+        users = db.query(User).options(*USER_CHILDREN, selectinload(User.transactions), defer(User.password)).all()
+        return {
+            user.email: {
+                **_serialize_user(user),
+                'transactions': [_transaction_row(transaction) for transaction in user.transactions]
             }
-        return users_by_email
+            for user in users
+        }
+    finally:
+        db.close()
+
+# Expense totals per normalized category, summed by the database
+def _expense_totals_statement(user_id):
+    category = func.lower(func.trim(Expense.category))
+    return select(category, func.sum(Expense.cost)).where(
+        Expense.user_id == user_id,
+        Expense.category.isnot(None),
+        category != ''
+    ).group_by(category)
+
+def _expense_totals(db, user_id):
+    rows = db.execute(_expense_totals_statement(user_id)).all()
+    return {name: float(total or 0.0) for name, total in rows}
+
+def get_expense_totals(user_id):
+    db = get_db()
+    try:
+        return _expense_totals(db, user_id)
+    finally:
+        db.close()
+
+# Transaction count and highest id, selected in the same statement as the user row so they
+# agree with its balance (see UserSnapshot.apply_transaction)
+def _transaction_stats(user_id):
+    mine = Transaction.user_id == user_id
+    return (
+        select(func.count(Transaction.id)).where(mine).scalar_subquery(),
+        select(func.coalesce(func.max(Transaction.id), 0)).where(mine).scalar_subquery(),
+    )
+
+def _load_snapshot(user_id):
+    # Take the revision before querying, so the put below is skipped if a write lands meanwhile
+    with user_cache.loading(user_id) as revision:
+        db = get_db()
+        try:
+            row = db.query(User, *_transaction_stats(user_id)).options(selectinload(User.budgets), defer(User.password)).filter(User.id == user_id).first()
+            if not row:
+                return None
+            user, transaction_count, transactions_through = row
+            frames = ledger.load(db, user.id)
+            snapshot = UserSnapshot(
+                id=user.id,
+                email=user.email,
+                # From the loaded rows rather than a separate query, so the two always agree
+                expense_totals=ledger.category_totals(frames['expenses']),
+                transaction_count=transaction_count,
+                transactions_through=transactions_through,
+                budget=_monthly_budget(user),
+                **_user_fields(user),
+                **frames
+            )
+            user_cache.put(user.id, snapshot, revision)
+            return snapshot
+        finally:
+            db.close()
+
+# Load only the given user's data (user row, budget, and expenses, debts and investments as
+# ledger frames); None if unknown.
+# Always hits the database and refreshes the shared cache entry.
+def load_user(email):
+    user_id = get_user_id(email)
+    return None if user_id is None else _load_snapshot(user_id)
+
+# Cached read used on every rerun; falls back to the database on a miss. With DB_ASYNC=1
+# the miss is served by database_async, which fetches the snapshot's parts concurrently.
+def get_user(user_id):
+    snapshot = user_cache.get(user_id)
+    if snapshot is None:
+        if ASYNC_LOADS:
+            from database_async import run, load_user_snapshot
+            snapshot = run(load_user_snapshot(user_id))
+        else:
+            snapshot = _load_snapshot(user_id)
+    return snapshot
+
+# Full account and routing numbers, read on demand (never cached); None if unknown
+def get_bank_details(user_id):
+    db = get_db()
+    try:
+        row = db.query(User.account_number, User.routing_number).filter(User.id == user_id).first()
+        return BankDetails(row.account_number, row.routing_number) if row else None
+    finally:
+        db.close()
+
+# Resolve an email to its user id (None if unknown)
+def get_user_id(email):
+    db = get_db()
+    try:
+        return db.query(User.id).filter(User.email == email).scalar()
     finally:
         db.close()
-
-# Save users (not needed for SQL)
-def save_users(users_db):
-    pass
-
-# Login user
-def login_user(email, password, users_db=None):
-    db = get_db()
-    try:
-        user = db.query(User).filter(User.email == email).first()
-        if user and check_password_hash(user.password, password):
-            return True
-        return False
-    finally:
-        db.close()
-
-# Signup user
+
+def _as_date(value):
+    return datetime.strptime(value, '%Y-%m-%d').date() if isinstance(value, str) else value
+
+def _transaction_filters(user_id, date_from=None, date_to=None, type=None):
+    criteria = [Transaction.user_id == user_id]
+    if date_from:
+        criteria.append(Transaction.date >= _as_date(date_from))
+    if date_to:
+        criteria.append(Transaction.date <= _as_date(date_to))
+    if type:
+        criteria.append(Transaction.type == type)
+    return criteria
+
+# Up to limit + 1 TRANSACTION_COLUMNS rows older than ``before``; the extra row tells whether
+# another page follows
+def _transaction_page_rows(db, user_id, before, limit, date_from=None, date_to=None, type=None):
+    query = db.query(*TRANSACTION_COLUMNS).filter(*_transaction_filters(user_id, date_from, date_to, type))
+    if before is not None:
+        before_date, before_id = before
+        query = query.filter(tuple_(Transaction.date, Transaction.id) < tuple_(_as_date(before_date), before_id))
+    return query.order_by(Transaction.date.desc(), Transaction.id.desc()).limit(limit + 1).all()
+
+# Page through a user's transactions, newest first. Keyset pagination: pass the returned
+# cursor as ``before`` to get the next page; it is None on the last page. Served by the
+# ix_transactions_user_date_id index, so a page costs the same at any depth.
+def list_transactions(user_id, before=None, limit=20, date_from=None, date_to=None, type=None):
+    db = get_db()
+    try:
+        rows = _transaction_page_rows(db, user_id, before, limit, date_from, date_to, type)
+        page = [_transaction_row(row) for row in rows[:limit]]
+        next_cursor = (page[-1]['date'], page[-1]['id']) if len(rows) > limit else None
+        return page, next_cursor
+    finally:
+        db.close()
+
+# Same page as list_transactions, as a ledger.transaction_frame (with amount_cents)
+def transaction_page(user_id, before=None, limit=20, date_from=None, date_to=None, type=None):
+    db = get_db()
+    try:
+        rows = _transaction_page_rows(db, user_id, before, limit, date_from, date_to, type)
+    finally:
+        db.close()
+    next_cursor = (rows[limit - 1].date, rows[limit - 1].id) if len(rows) > limit else None
+    return ledger.transaction_frame(rows[:limit]), next_cursor
+
+def count_transactions(user_id, date_from=None, date_to=None, type=None):
+    db = get_db()
+    try:
+        return db.query(func.count(Transaction.id)).filter(*_transaction_filters(user_id, date_from, date_to, type)).scalar()
+    finally:
+        db.close()
+
+# Check whether an account already exists for this email
+def user_exists(email):
+    return get_user_id(email) is not None
+
+# Save users (not needed for SQL)
+def save_users(users_db):
+    pass
+
+# Login user; returns the user's id (kept in the session for the *_for_user helpers) or None.
+# Raises LoginThrottled once the email or client IP has used up its attempts, or while the
+# password pool is saturated. A hash made with an older PASSWORD_HASH_METHOD is replaced.
+def login_user(email, password, users_db=None, client=None):
+    login_throttle.check(email, client)
+    db = get_db()
+    try:
+        user = db.query(User.id, User.password).filter(User.email == email).first()
+        try:
+            if not (user and verify_password(user.password, password)):
+                return None
+            if needs_rehash(user.password):
+                # Conditional on the old hash, so a concurrent password change wins
+                db.execute(update(User).where(User.id == user.id, User.password == user.password).values(password=hash_password(password)))
+                db.commit()
+        except PasswordPoolBusy:
+            raise LoginThrottled(1.0)
+        return user.id
+    finally:
+        db.close()
+
+# Signup user
 def signup_user(user_data, users_db=None):
     db = get_db()
     try:
         existing = db.query(User).filter(User.email == user_data['email']).first()
         if existing:
             return False
-        user = User(
-            email=user_data['email'],
-            password=generate_password_hash(user_data['password']),
-            full_name=user_data['full_name'],
-            birth_date=datetime.strptime(user_data['birth_date'], '%Y-%m-%d').date() if user_data.get('birth_date') else None,
-            gender=user_data.get('gender'),
-            phone=user_data.get('phone'),
-            bank_name=user_data.get('bank_name'),
-            account_number=user_data.get('account_number'),
-            routing_number=user_data.get('routing_number'),
-            account_type=user_data.get('account_type'),
-            balance=user_data.get('balance', 0.0),
-            budget=user_data.get('budget', {})
-        )
-        db.add(user)
-        db.commit()
-        return True
-    except Exception as e:
-        db.rollback()
-        return False
-    finally:
-        db.close()
-
-# Add transaction to user account
-def add_transaction(email, transaction_data, users_db=None):
-    db = get_db()
-    try:
-        user = db.query(User).filter(User.email == email).first()
-        if not user:
-            return False
-        trans = Transaction(
-            user_id=user.id,
-            date=datetime.strptime(transaction_data['date'], '%Y-%m-%d').date(),
-            description=transaction_data['description'],
-            amount=transaction_data['amount'],
-            type=transaction_data['type'],
-            notes=transaction_data.get('notes', '')
-        )
-        db.add(trans)
-        user.balance += transaction_data['amount']
-        db.commit()
-        return True
-    except Exception as e:
-        db.rollback()
-        return False
-    finally:
-        db.close()
-
-# Add expense to user account
-def add_expense(email, expense_data, users_db=None):
+        user = User(
+            email=user_data['email'],
+            password=hash_password(user_data['password']),
+            full_name=user_data['full_name'],
+            birth_date=datetime.strptime(user_data['birth_date'], '%Y-%m-%d').date() if user_data.get('birth_date') else None,
+            gender=user_data.get('gender'),
+            phone=user_data.get('phone'),
+            bank_name=user_data.get('bank_name'),
+            account_number=user_data.get('account_number'),
+            routing_number=user_data.get('routing_number'),
+            account_type=user_data.get('account_type'),
+            balance=user_data.get('balance', 0.0)
+        )
+        db.add(user)
+        db.flush()
+        db.add_all(Budget(user_id=user.id, category=category, period=MONTHLY, amount=amount) for category, amount in _budget_amounts(user_data.get('budget')).items())
+        db.commit()
+        return True
+    except Exception as e:
+        db.rollback()
+        return False
+    finally:
+        db.close()
+
+# The mutators below are keyed by the user id resolved at login (st.session_state.user_id),
+# so each one is a single INSERT/UPDATE/DELETE ... RETURNING scoped by "AND user_id = ?"
+# rather than a lookup by email followed by an ORM load. They return the persisted row (as
+# stored in a UserSnapshot) on success, or None, and apply that row to the cached snapshot
+# so readers never need a reload. The email-keyed versions further down resolve the id and
+# delegate; they are kept for compatibility.
+
+# Add transaction to user account; returns (row, new_balance)
+def add_transaction_for_user(user_id, transaction_data):
     db = get_db()
     try:
-        user = db.query(User).filter(User.email == email).first()
-        if not user:
-            return False, "User not found"
-
-        name = expense_data['name'].strip()
-        category = expense_data['category'].strip().lower()
-        # Prevent duplicate expense entries for the same user/category/name (case-insensitive)
-        existing = db.query(Expense).filter(
-            Expense.user_id == user.id,
-            func.lower(Expense.name) == func.lower(name),
-            func.lower(Expense.category) == func.lower(category)
-        ).first()
-        if existing:
-            return False, "Expense already exists"
+        # Apply the amount server-side (balance = balance + :amount) so concurrent writers
+        # can't lose each other's updates. The UPDATE also locks the user row (the whole
+        # database on SQLite), serializing writers until this transaction commits.
+        balance = db.execute(
+            update(User)
+            .where(User.id == user_id)
+            .values(balance=func.coalesce(User.balance, 0.0) + transaction_data['amount'])
+            .returning(User.balance)
+        ).scalar()
+        if balance is None:
+            db.rollback()
+            return None, None
+        row = db.execute(
+            insert(Transaction).values(
+                user_id=user_id,
+                date=datetime.strptime(transaction_data['date'], '%Y-%m-%d').date(),
+                description=transaction_data['description'],
+                amount=transaction_data['amount'],
+                type=transaction_data['type'],
+                notes=transaction_data.get('notes', '')
+            ).returning(*TRANSACTION_COLUMNS)
+        ).one()
+        db.commit()
+        row = _transaction_row(row)
+        user_cache.patch(user_id, lambda snapshot: snapshot.apply_transaction(row, balance))
+        return row, balance
+    except Exception as e:
+        db.rollback()
+        return None, None
+    finally:
+        db.close()
 
-        expense = Expense(
-            user_id=user.id,
-            name=expense_data['name'],
-            category=expense_data['category'],
-            cost=expense_data['cost']
-        )
-        db.add(expense)
+def _expense_changes(expense_data):
+    # The date is left alone on update unless the caller passes it
+    values = {
+        'name': expense_data['name'].strip(),
+        'category': expense_data['category'].strip(),
+        'cost': expense_data['cost'],
+    }
+    if expense_data.get('date'):
+        values['date'] = _as_date(expense_data['date'])
+    return values
+
+# Add expense to user account; dated today unless expense_data has a 'date'
+def add_expense_for_user(user_id, expense_data):
+    db = get_db()
+    try:
+        # Duplicates (same user/name/category/date, case-insensitive) are rejected by the
+        # uq_expenses_user_name_category_date index rather than a pre-query
+        row = db.execute(
+            insert(Expense).values({'user_id': user_id, 'date': date.today(), **_expense_changes(expense_data)}).returning(*EXPENSE_COLUMNS)
+        ).one()
         db.commit()
-        return True, None
+        row = _expense_row(row)
+        budget_periods.invalidate(user_id, row['date'])
+        user_cache.patch(user_id, lambda snapshot: snapshot.apply_added('expenses', row))
+        return row, None
+    except IntegrityError:
+        db.rollback()
+        return None, "Expense already exists on that date"
     except Exception as e:
         db.rollback()
-        return False, "Database error"
+        return None, "Database error"
     finally:
         db.close()
 
-def update_expense(email, expense_id, expense_data):
+def update_expense_for_user(user_id, expense_id, expense_data):
     db = get_db()
     try:
-        user = db.query(User).filter(User.email == email).first()
-        if not user:
-            return False, "User not found"
-        expense = db.query(Expense).filter(Expense.id == expense_id, Expense.user_id == user.id).first()
-        if not expense:
-            return False, "Expense not found"
-        name = expense_data['name'].strip()
-        category = expense_data['category'].strip().lower()
-        dup = db.query(Expense).filter(
-            Expense.user_id == user.id,
-            func.lower(Expense.name) == func.lower(name),
-            func.lower(Expense.category) == func.lower(category),
-            Expense.id != expense_id
+        row = db.execute(
+            update(Expense)
+            .where(Expense.id == expense_id, Expense.user_id == user_id)
+            .values(**_expense_changes(expense_data))
+            .returning(*EXPENSE_COLUMNS)
         ).first()
-        if dup:
-            return False, "Duplicate expense in this category"
-        expense.name = name
-        expense.category = expense_data['category']
-        expense.cost = expense_data['cost']
+        if not row:
+            db.rollback()
+            return None, "Expense not found"
         db.commit()
-        return True, None
+        row = _expense_row(row)
+        # The month it moved out of isn't known here, so drop all of the user's months
+        budget_periods.invalidate(user_id)
+        user_cache.patch(user_id, lambda snapshot: snapshot.apply_updated('expenses', row))
+        return row, None
+    except IntegrityError:
+        db.rollback()
+        return None, "Duplicate expense in this category on that date"
     except Exception:
         db.rollback()
-        return False, "Database error"
+        return None, "Database error"
     finally:
         db.close()
 
-def delete_expense(email, expense_id):
+def delete_expense_for_user(user_id, expense_id):
     db = get_db()
     try:
-        user = db.query(User).filter(User.email == email).first()
-        if not user:
-            return False, "User not found"
-        expense = db.query(Expense).filter(Expense.id == expense_id, Expense.user_id == user.id).first()
-        if not expense:
-            return False, "Expense not found"
-        db.delete(expense)
+        row = db.execute(
+            delete(Expense)
+            .where(Expense.id == expense_id, Expense.user_id == user_id)
+            .returning(*EXPENSE_COLUMNS)
+        ).first()
+        if not row:
+            db.rollback()
+            return None, "Expense not found"
         db.commit()
-        return True, None
+        row = _expense_row(row)
+        budget_periods.invalidate(user_id, row['date'] or None)
+        user_cache.patch(user_id, lambda snapshot: snapshot.apply_deleted('expenses', row))
+        return row, None
     except Exception:
         db.rollback()
-        return False, "Database error"
+        return None, "Database error"
     finally:
         db.close()
-
-# Add debt to user account
-def add_debt(email, debt_data, users_db=None):
+
+# Add debt to user account
+def add_debt_for_user(user_id, debt_data):
     db = get_db()
     try:
-        user = db.query(User).filter(User.email == email).first()
-        if not user:
-            return False
-        debt = Debt(
-            user_id=user.id,
-            name=debt_data['name'],
-            amount_owed=debt_data['amount_owed'],
-            interest_rate=debt_data['interest_rate'],
-            monthly_pay=debt_data['monthly_pay']
-        )
-        db.add(debt)
-        db.commit()
-        return True
-    except Exception as e:
+        row = db.execute(
+            insert(Debt).values(
+                user_id=user_id,
+                name=debt_data['name'],
+                amount_owed=debt_data['amount_owed'],
+                interest_rate=debt_data['interest_rate'],
+                monthly_pay=debt_data['monthly_pay']
+            ).returning(*DEBT_COLUMNS)
+        ).one()
+        db.commit()
+        row = _debt_row(row)
+        user_cache.patch(user_id, lambda snapshot: snapshot.apply_added('debts', row))
+        return row
+    except Exception as e:
         db.rollback()
-        return False
+        return None
     finally:
         db.close()
 
-def update_debt(email, debt_id, debt_data):
+def update_debt_for_user(user_id, debt_id, debt_data):
     db = get_db()
     try:
-        user = db.query(User).filter(User.email == email).first()
-        if not user:
-            return False, "User not found"
-        debt = db.query(Debt).filter(Debt.id == debt_id, Debt.user_id == user.id).first()
-        if not debt:
-            return False, "Debt not found"
-        debt.name = debt_data['name']
-        debt.amount_owed = debt_data['amount_owed']
-        debt.interest_rate = debt_data['interest_rate']
-        debt.monthly_pay = debt_data['monthly_pay']
+        row = db.execute(
+            update(Debt)
+            .where(Debt.id == debt_id, Debt.user_id == user_id)
+            .values(
+                name=debt_data['name'],
+                amount_owed=debt_data['amount_owed'],
+                interest_rate=debt_data['interest_rate'],
+                monthly_pay=debt_data['monthly_pay']
+            )
+            .returning(*DEBT_COLUMNS)
+        ).first()
+        if not row:
+            db.rollback()
+            return None, "Debt not found"
         db.commit()
-        return True, None
+        row = _debt_row(row)
+        user_cache.patch(user_id, lambda snapshot: snapshot.apply_updated('debts', row))
+        return row, None
     except Exception:
         db.rollback()
-        return False, "Database error"
+        return None, "Database error"
     finally:
         db.close()
 
-def delete_debt(email, debt_id):
+def delete_debt_for_user(user_id, debt_id):
     db = get_db()
     try:
-        user = db.query(User).filter(User.email == email).first()
-        if not user:
-            return False, "User not found"
-        debt = db.query(Debt).filter(Debt.id == debt_id, Debt.user_id == user.id).first()
-        if not debt:
-            return False, "Debt not found"
-        db.delete(debt)
+        row = db.execute(
+            delete(Debt)
+            .where(Debt.id == debt_id, Debt.user_id == user_id)
+            .returning(*DEBT_COLUMNS)
+        ).first()
+        if not row:
+            db.rollback()
+            return None, "Debt not found"
         db.commit()
-        return True, None
+        row = _debt_row(row)
+        user_cache.patch(user_id, lambda snapshot: snapshot.apply_deleted('debts', row))
+        return row, None
     except Exception:
         db.rollback()
-        return False, "Database error"
+        return None, "Database error"
     finally:
         db.close()
-
-# Add investment to user account
-def add_investment(email, investment_data, users_db=None):
+
+# Add investment to user account
+def add_investment_for_user(user_id, investment_data):
     db = get_db()
     try:
-        user = db.query(User).filter(User.email == email).first()
-        if not user:
-            return False
-        inv = Investment(
-            user_id=user.id,
-            name=investment_data['name'],
-            amount=investment_data['amount'],
-            risk_level=investment_data['risk_level']
-        )
-        db.add(inv)
-        db.commit()
-        return True
-    except Exception as e:
+        row = db.execute(
+            insert(Investment).values(
+                user_id=user_id,
+                name=investment_data['name'],
+                amount=investment_data['amount'],
+                risk_level=investment_data['risk_level'],
+                symbol=_symbol(investment_data.get('symbol')),
+                quantity=investment_data.get('quantity') or None
+            ).returning(*INVESTMENT_COLUMNS)
+        ).one()
+        db.commit()
+        row = _investment_row(row)
+        user_cache.patch(user_id, lambda snapshot: snapshot.apply_added('investments', row))
+        return row
+    except Exception as e:
         db.rollback()
-        return False
+        return None
     finally:
         db.close()
 
-def update_investment(email, investment_id, investment_data):
+def _investment_changes(investment_data):
+    # symbol/quantity are left alone unless the caller passes them
+    values = {
+        'name': investment_data['name'],
+        'amount': investment_data['amount'],
+        'risk_level': investment_data['risk_level'],
+    }
+    if 'symbol' in investment_data:
+        values['symbol'] = _symbol(investment_data['symbol'])
+    if 'quantity' in investment_data:
+        values['quantity'] = investment_data['quantity'] or None
+    return values
+
+def update_investment_for_user(user_id, investment_id, investment_data):
     db = get_db()
     try:
-        user = db.query(User).filter(User.email == email).first()
-        if not user:
-            return False, "User not found"
-        investment = db.query(Investment).filter(Investment.id == investment_id, Investment.user_id == user.id).first()
-        if not investment:
-            return False, "Investment not found"
-        investment.name = investment_data['name']
-        investment.amount = investment_data['amount']
-        investment.risk_level = investment_data['risk_level']
+        row = db.execute(
+            update(Investment)
+            .where(Investment.id == investment_id, Investment.user_id == user_id)
+            .values(**_investment_changes(investment_data))
+            .returning(*INVESTMENT_COLUMNS)
+        ).first()
+        if not row:
+            db.rollback()
+            return None, "Investment not found"
         db.commit()
-        return True, None
+        row = _investment_row(row)
+        user_cache.patch(user_id, lambda snapshot: snapshot.apply_updated('investments', row))
+        return row, None
     except Exception:
         db.rollback()
-        return False, "Database error"
+        return None, "Database error"
     finally:
         db.close()
 
-def delete_investment(email, investment_id):
+def delete_investment_for_user(user_id, investment_id):
     db = get_db()
     try:
-        user = db.query(User).filter(User.email == email).first()
-        if not user:
-            return False, "User not found"
-        investment = db.query(Investment).filter(Investment.id == investment_id, Investment.user_id == user.id).first()
-        if not investment:
-            return False, "Investment not found"
-        db.delete(investment)
+        row = db.execute(
+            delete(Investment)
+            .where(Investment.id == investment_id, Investment.user_id == user_id)
+            .returning(*INVESTMENT_COLUMNS)
+        ).first()
+        if not row:
+            db.rollback()
+            return None, "Investment not found"
         db.commit()
-        return True, None
+        row = _investment_row(row)
+        user_cache.patch(user_id, lambda snapshot: snapshot.apply_deleted('investments', row))
+        return row, None
     except Exception:
         db.rollback()
-        return False, "Database error"
+        return None, "Database error"
     finally:
         db.close()
-
-# Update user budget
-def update_user_budget(email, budget):
-    db = get_db()
-    try:
-        user = db.query(User).filter(User.email == email).first()
-        if not user:
-            return False
-        user.budget = budget
-        db.commit()
-        return True
-    except Exception as e:
-        db.rollback()
-        return False
-    finally:
+
+def _budget_amounts(budget):
+    # Categories are stored trimmed and lower-cased, so they match expense totals; amounts
+    # are rounded to the cent, as Money stores them
+    return {category.strip().lower(): from_cents(to_cents(amount)) for category, amount in (budget or {}).items() if category.strip()}
+
+def _stored_budget_statement(user_id):
+    return select(Budget.category, Budget.amount).where(Budget.user_id == user_id, Budget.period == MONTHLY)
+
+def _budget_upsert(dialect_name, user_id, amounts):
+    # INSERT ... ON CONFLICT (user_id, category, period) DO UPDATE, in one statement
+    insert_for_dialect = postgresql_insert if dialect_name == 'postgresql' else sqlite_insert
+    statement = insert_for_dialect(Budget).values([
+        {'user_id': user_id, 'category': category, 'period': MONTHLY, 'amount': amount}
+        for category, amount in amounts.items()
+    ])
+    return statement.on_conflict_do_update(
+        index_elements=[Budget.user_id, Budget.category, Budget.period],
+        set_={'amount': statement.excluded.amount},
+    )
+
+def _budget_changes(stored, budget):
+    # Only categories whose amount differs from the stored one are written
+    return {category: amount for category, amount in _budget_amounts(budget).items() if stored.get(category) != amount}
+
+# Update user budget; returns the stored budget. Upserts only the categories that changed;
+# categories missing from ``budget`` keep their stored amounts.
+def update_user_budget_for_user(user_id, budget):
+    db = get_db()
+    try:
+        if db.query(User.id).filter(User.id == user_id).first() is None:
+            return None
+        stored = dict(db.execute(_stored_budget_statement(user_id)).all())
+        changes = _budget_changes(stored, budget)
+        if changes:
+            db.execute(_budget_upsert(db.get_bind().dialect.name, user_id, changes))
+            db.commit()
+        stored.update(changes)
+        user_cache.patch(user_id, lambda snapshot: snapshot.apply_budget(stored))
+        return stored
+    except Exception as e:
+        db.rollback()
+        return None
+    finally:
         db.close()
+
+# Email-keyed versions (for compatibility): resolve the user id, then delegate.
+# add_transaction and update_user_budget return True/False, as they always have.
+def add_transaction(email, transaction_data, users_db=None):
+    user_id = get_user_id(email)
+    if user_id is None:
+        return False
+    row, _ = add_transaction_for_user(user_id, transaction_data)
+    return row is not None
+
+def add_expense(email, expense_data, users_db=None):
+    user_id = get_user_id(email)
+    if user_id is None:
+        return None, "User not found"
+    return add_expense_for_user(user_id, expense_data)
+
+def update_expense(email, expense_id, expense_data):
+    user_id = get_user_id(email)
+    if user_id is None:
+        return None, "User not found"
+    return update_expense_for_user(user_id, expense_id, expense_data)
+
+def delete_expense(email, expense_id):
+    user_id = get_user_id(email)
+    if user_id is None:
+        return None, "User not found"
+    return delete_expense_for_user(user_id, expense_id)
+
+def add_debt(email, debt_data, users_db=None):
+    user_id = get_user_id(email)
+    if user_id is None:
+        return None
+    return add_debt_for_user(user_id, debt_data)
+
+def update_debt(email, debt_id, debt_data):
+    user_id = get_user_id(email)
+    if user_id is None:
+        return None, "User not found"
+    return update_debt_for_user(user_id, debt_id, debt_data)
+
+def delete_debt(email, debt_id):
+    user_id = get_user_id(email)
+    if user_id is None:
+        return None, "User not found"
+    return delete_debt_for_user(user_id, debt_id)
+
+def add_investment(email, investment_data, users_db=None):
+    user_id = get_user_id(email)
+    if user_id is None:
+        return None
+    return add_investment_for_user(user_id, investment_data)
+
+def update_investment(email, investment_id, investment_data):
+    user_id = get_user_id(email)
+    if user_id is None:
+        return None, "User not found"
+    return update_investment_for_user(user_id, investment_id, investment_data)
+
+def delete_investment(email, investment_id):
+    user_id = get_user_id(email)
+    if user_id is None:
+        return None, "User not found"
+    return delete_investment_for_user(user_id, investment_id)
+
+def update_user_budget(email, budget):
+    user_id = get_user_id(email)
+    if user_id is None:
+        return False
+    return update_user_budget_for_user(user_id, budget) is not None
+
+# With INSTRUMENT=1, every public function above reports its calls and time
+instrumentation.instrument_functions(globals(), __name__)
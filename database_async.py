@@ -0,0 +1,373 @@
+"""asyncio counterpart of database.py, on an AsyncEngine (aiosqlite / asyncpg).
+
+Covers login, signup, the snapshot load and the id-keyed mutators with the same
+arguments and return values as their database.py namesakes, and keeps the shared
+``database.user_cache`` current the same way. Independent reads run concurrently,
+each on its own pooled connection. ``load_user_snapshot`` fetches the user row,
+expenses, debts, investments, category totals and transaction count at once.
+
+All coroutines run on one background event loop, so synchronous Streamlit code can
+call ``run(coro)`` from any script thread while the connections stay bound to a
+single loop. Set DB_ASYNC=1 to have ``database.get_user`` load snapshots this way.
+"""
+import asyncio
+import threading
+from datetime import date, datetime
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import defer
+
+import budget_periods
+import ledger
+from database import (
+    DEBT_COLUMNS,
+    EXPENSE_COLUMNS,
+    INVESTMENT_COLUMNS,
+    TRANSACTION_COLUMNS,
+    _budget_amounts,
+    _budget_changes,
+    _budget_upsert,
+    _debt_row,
+    _expense_changes,
+    _expense_row,
+    _expense_totals_statement,
+    _investment_changes,
+    _investment_row,
+    _stored_budget_statement,
+    _transaction_row,
+    _transaction_stats,
+    _user_fields,
+    user_cache,
+)
+from db_config import build_async_engine
+from models import DATABASE_URL, MONTHLY, Budget, Debt, Expense, Investment, Transaction, User
+from passwords import PasswordPoolBusy, hash_password_async, needs_rehash, verify_password_async
+from snapshot import UserSnapshot
+from throttle import LoginThrottled, login_throttle
+
+async_engine = build_async_engine(DATABASE_URL)
+AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
+
+# collection name -> (model, RETURNING columns, row builder, label for "... not found")
+CHILD_TABLES = {
+    'expenses': (Expense, EXPENSE_COLUMNS, _expense_row, "Expense"),
+    'debts': (Debt, DEBT_COLUMNS, _debt_row, "Debt"),
+    'investments': (Investment, INVESTMENT_COLUMNS, _investment_row, "Investment"),
+}
+
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def _background_loop():
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="database-async", daemon=True).start()
+        return _loop
+
+
+def run(coro):
+    """Run ``coro`` on the shared background loop and wait for its result."""
+    return asyncio.run_coroutine_threadsafe(coro, _background_loop()).result()
+
+
+# Reads
+
+async def get_user_id(email):
+    async with AsyncSessionLocal() as db:
+        return await db.scalar(select(User.id).where(User.email == email))
+
+
+async def login_user(email, password, client=None):
+    login_throttle.check(email, client)
+    async with AsyncSessionLocal() as db:
+        user = (await db.execute(select(User.id, User.password).where(User.email == email))).first()
+        # Hash checks are CPU-bound; they run on the passwords pool, off the event loop
+        try:
+            if not (user and await verify_password_async(user.password, password)):
+                return None
+            if needs_rehash(user.password):
+                new_hash = await hash_password_async(password)
+                await db.execute(update(User).where(User.id == user.id, User.password == user.password).values(password=new_hash))
+                await db.commit()
+        except PasswordPoolBusy:
+            raise LoginThrottled(1.0)
+    return user.id
+
+
+async def fetch_frame(user_id, collection):
+    async with AsyncSessionLocal() as db:
+        rows = (await db.execute(ledger.statement(collection, user_id))).all()
+    return ledger.build(collection, rows)
+
+
+async def fetch_expense_totals(user_id):
+    async with AsyncSessionLocal() as db:
+        rows = (await db.execute(_expense_totals_statement(user_id))).all()
+    return {name: float(total or 0.0) for name, total in rows}
+
+
+async def count_transactions(user_id):
+    async with AsyncSessionLocal() as db:
+        return await db.scalar(select(func.count(Transaction.id)).where(Transaction.user_id == user_id))
+
+
+async def _fetch_user(user_id):
+    # (user, transaction count, highest transaction id) in one statement, as in
+    # database._load_snapshot, without the password hash
+    async with AsyncSessionLocal() as db:
+        statement = select(User, *_transaction_stats(user_id)).options(defer(User.password)).where(User.id == user_id)
+        return (await db.execute(statement)).first()
+
+
+async def fetch_budget(user_id):
+    async with AsyncSessionLocal() as db:
+        return dict((await db.execute(_stored_budget_statement(user_id))).all())
+
+
+async def load_user_snapshot(user_id):
+    """Load a user's snapshot with every part fetched concurrently; None if unknown."""
+    with user_cache.loading(user_id) as revision:
+        row, expenses, debts, investments, budget = await asyncio.gather(
+            _fetch_user(user_id),
+            fetch_frame(user_id, 'expenses'),
+            fetch_frame(user_id, 'debts'),
+            fetch_frame(user_id, 'investments'),
+            fetch_budget(user_id),
+        )
+        if row is None:
+            return None
+        user, transaction_count, transactions_through = row
+        snapshot = UserSnapshot(
+            id=user.id,
+            email=user.email,
+            # From the fetched rows rather than a separate query, so the two always agree
+            expense_totals=ledger.category_totals(expenses),
+            transaction_count=transaction_count,
+            transactions_through=transactions_through,
+            expenses=expenses,
+            debts=debts,
+            investments=investments,
+            budget=budget,
+            **_user_fields(user)
+        )
+        user_cache.put(user.id, snapshot, revision)
+        return snapshot
+
+
+async def get_user(user_id):
+    snapshot = user_cache.get(user_id)
+    if snapshot is None:
+        snapshot = await load_user_snapshot(user_id)
+    return snapshot
+
+
+# Writes
+
+async def signup_user(user_data):
+    password_hash = await hash_password_async(user_data['password'])
+    async with AsyncSessionLocal() as db:
+        try:
+            if await db.scalar(select(User.id).where(User.email == user_data['email'])) is not None:
+                return False
+            user = User(
+                email=user_data['email'],
+                password=password_hash,
+                full_name=user_data['full_name'],
+                birth_date=datetime.strptime(user_data['birth_date'], '%Y-%m-%d').date() if user_data.get('birth_date') else None,
+                gender=user_data.get('gender'),
+                phone=user_data.get('phone'),
+                bank_name=user_data.get('bank_name'),
+                account_number=user_data.get('account_number'),
+                routing_number=user_data.get('routing_number'),
+                account_type=user_data.get('account_type'),
+                balance=user_data.get('balance', 0.0)
+            )
+            db.add(user)
+            await db.flush()
+            db.add_all(Budget(user_id=user.id, category=category, period=MONTHLY, amount=amount) for category, amount in _budget_amounts(user_data.get('budget')).items())
+            await db.commit()
+            return True
+        except Exception:
+            await db.rollback()
+            return False
+
+
+async def add_transaction_for_user(user_id, transaction_data):
+    async with AsyncSessionLocal() as db:
+        try:
+            # Same atomic balance = balance + :amount as database.add_transaction_for_user
+            balance = await db.scalar(
+                update(User)
+                .where(User.id == user_id)
+                .values(balance=func.coalesce(User.balance, 0.0) + transaction_data['amount'])
+                .returning(User.balance)
+            )
+            if balance is None:
+                await db.rollback()
+                return None, None
+            row = (await db.execute(
+                insert(Transaction).values(
+                    user_id=user_id,
+                    date=datetime.strptime(transaction_data['date'], '%Y-%m-%d').date(),
+                    description=transaction_data['description'],
+                    amount=transaction_data['amount'],
+                    type=transaction_data['type'],
+                    notes=transaction_data.get('notes', '')
+                ).returning(*TRANSACTION_COLUMNS)
+            )).one()
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            return None, None
+    row = _transaction_row(row)
+    user_cache.patch(user_id, lambda snapshot: snapshot.apply_transaction(row, balance))
+    return row, balance
+
+
+async def _insert_child(user_id, collection, values):
+    model, columns, to_row, _ = CHILD_TABLES[collection]
+    async with AsyncSessionLocal() as db:
+        try:
+            row = (await db.execute(insert(model).values(user_id=user_id, **values).returning(*columns))).one()
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+    row = to_row(row)
+    user_cache.patch(user_id, lambda snapshot: snapshot.apply_added(collection, row))
+    return row
+
+
+async def _update_child(user_id, collection, row_id, values):
+    model, columns, to_row, label = CHILD_TABLES[collection]
+    async with AsyncSessionLocal() as db:
+        try:
+            row = (await db.execute(
+                update(model).where(model.id == row_id, model.user_id == user_id).values(**values).returning(*columns)
+            )).first()
+            if not row:
+                await db.rollback()
+                return None, f"{label} not found"
+            await db.commit()
+        except IntegrityError:
+            await db.rollback()
+            # Only expenses have a unique key a user can hit; update_expense_for_user reports it
+            if collection == 'expenses':
+                raise
+            return None, "Database error"
+        except Exception:
+            await db.rollback()
+            return None, "Database error"
+    row = to_row(row)
+    user_cache.patch(user_id, lambda snapshot: snapshot.apply_updated(collection, row))
+    return row, None
+
+
+async def _delete_child(user_id, collection, row_id):
+    model, columns, to_row, label = CHILD_TABLES[collection]
+    async with AsyncSessionLocal() as db:
+        try:
+            row = (await db.execute(
+                delete(model).where(model.id == row_id, model.user_id == user_id).returning(*columns)
+            )).first()
+            if not row:
+                await db.rollback()
+                return None, f"{label} not found"
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            return None, "Database error"
+    row = to_row(row)
+    user_cache.patch(user_id, lambda snapshot: snapshot.apply_deleted(collection, row))
+    return row, None
+
+
+async def add_expense_for_user(user_id, expense_data):
+    try:
+        row = await _insert_child(user_id, 'expenses', {'date': date.today(), **_expense_changes(expense_data)})
+    except IntegrityError:
+        return None, "Expense already exists on that date"
+    except Exception:
+        return None, "Database error"
+    budget_periods.invalidate(user_id, row['date'])
+    return row, None
+
+
+async def update_expense_for_user(user_id, expense_id, expense_data):
+    try:
+        row, message = await _update_child(user_id, 'expenses', expense_id, _expense_changes(expense_data))
+    except IntegrityError:
+        return None, "Duplicate expense in this category on that date"
+    if row:
+        budget_periods.invalidate(user_id)
+    return row, message
+
+
+async def delete_expense_for_user(user_id, expense_id):
+    row, message = await _delete_child(user_id, 'expenses', expense_id)
+    if row:
+        budget_periods.invalidate(user_id, row['date'] or None)
+    return row, message
+
+
+def _debt_values(debt_data):
+    return {
+        'name': debt_data['name'],
+        'amount_owed': debt_data['amount_owed'],
+        'interest_rate': debt_data['interest_rate'],
+        'monthly_pay': debt_data['monthly_pay'],
+    }
+
+
+async def add_debt_for_user(user_id, debt_data):
+    try:
+        return await _insert_child(user_id, 'debts', _debt_values(debt_data))
+    except Exception:
+        return None
+
+
+async def update_debt_for_user(user_id, debt_id, debt_data):
+    return await _update_child(user_id, 'debts', debt_id, _debt_values(debt_data))
+
+
+async def delete_debt_for_user(user_id, debt_id):
+    return await _delete_child(user_id, 'debts', debt_id)
+
+
+async def add_investment_for_user(user_id, investment_data):
+    try:
+        values = {'symbol': None, 'quantity': None, **investment_data}
+        return await _insert_child(user_id, 'investments', _investment_changes(values))
+    except Exception:
+        return None
+
+
+async def update_investment_for_user(user_id, investment_id, investment_data):
+    return await _update_child(user_id, 'investments', investment_id, _investment_changes(investment_data))
+
+
+async def delete_investment_for_user(user_id, investment_id):
+    return await _delete_child(user_id, 'investments', investment_id)
+
+
+async def update_user_budget_for_user(user_id, budget):
+    async with AsyncSessionLocal() as db:
+        try:
+            if await db.scalar(select(User.id).where(User.id == user_id)) is None:
+                return None
+            stored = dict((await db.execute(_stored_budget_statement(user_id))).all())
+            changes = _budget_changes(stored, budget)
+            if changes:
+                await db.execute(_budget_upsert(async_engine.dialect.name, user_id, changes))
+                await db.commit()
+        except Exception:
+            await db.rollback()
+            return None
+    stored.update(changes)
+    user_cache.patch(user_id, lambda snapshot: snapshot.apply_budget(stored))
+    return stored
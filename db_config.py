@@ -0,0 +1,222 @@
+"""Engine and connection-pool configuration for models.engine.
+
+Each backend starts from a preset below; any DB_* environment variable overrides it:
+
+    DB_POOL_SIZE, DB_MAX_OVERFLOW     pooled connections kept open / extra ones allowed under load
+    DB_POOL_TIMEOUT                   seconds to wait for a free connection before failing
+    DB_POOL_RECYCLE                   seconds after which a connection is replaced (-1 disables)
+    DB_POOL_PRE_PING                  1/0: test connections on checkout (drops dead ones after restarts)
+    DB_QUERY_CACHE_SIZE               SQLAlchemy compiled-statement cache entries
+    DB_STATEMENT_TIMEOUT_MS           Postgres statement_timeout (0 disables)
+    DB_PREPARE_THRESHOLD              psycopg 3 only: executions before a statement is server-prepared
+    DB_SQLITE_BUSY_TIMEOUT_MS         how long SQLite waits on a lock before "database is locked"
+    DB_SQLITE_JOURNAL_MODE            e.g. WAL (readers don't block the writer)
+    DB_SQLITE_SYNCHRONOUS             e.g. NORMAL (safe with WAL, far fewer fsyncs than FULL)
+    DB_SQLITE_MMAP_SIZE               bytes of the database file to memory-map
+    DB_ECHO                           1 to log every statement
+
+Pool checkout waits are recorded in ``pool_metrics``. ``build_async_engine`` applies the
+same settings to the asyncio engine used by database_async (aiosqlite / asyncpg drivers).
+"""
+import os
+import threading
+import time
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+
+PRESETS = {
+    'postgresql': {
+        'pool_size': 10,
+        'max_overflow': 20,
+        'pool_timeout': 30,
+        'pool_recycle': 1800,
+        'pool_pre_ping': True,
+        'query_cache_size': 1200,
+        'statement_timeout_ms': 15000,
+        'prepare_threshold': 5,
+    },
+    'sqlite': {
+        # Writers are serialized by SQLite itself; a few connections cover concurrent readers
+        'pool_size': 5,
+        'max_overflow': 10,
+        'pool_timeout': 30,
+        'pool_recycle': -1,
+        'pool_pre_ping': False,
+        'query_cache_size': 1200,
+        'busy_timeout_ms': 5000,
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'mmap_size': 256 * 1024 * 1024,
+    },
+}
+
+ENV_OVERRIDES = {
+    'pool_size': ('DB_POOL_SIZE', int),
+    'max_overflow': ('DB_MAX_OVERFLOW', int),
+    'pool_timeout': ('DB_POOL_TIMEOUT', float),
+    'pool_recycle': ('DB_POOL_RECYCLE', int),
+    'pool_pre_ping': ('DB_POOL_PRE_PING', lambda v: v.strip().lower() in ('1', 'true', 'yes', 'on')),
+    'query_cache_size': ('DB_QUERY_CACHE_SIZE', int),
+    'statement_timeout_ms': ('DB_STATEMENT_TIMEOUT_MS', int),
+    'prepare_threshold': ('DB_PREPARE_THRESHOLD', int),
+    'busy_timeout_ms': ('DB_SQLITE_BUSY_TIMEOUT_MS', int),
+    'journal_mode': ('DB_SQLITE_JOURNAL_MODE', str),
+    'synchronous': ('DB_SQLITE_SYNCHRONOUS', str),
+    'mmap_size': ('DB_SQLITE_MMAP_SIZE', int),
+}
+
+
+class PoolMetrics:
+    """Counters for how long callers wait to check a connection out of the pool."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.checkouts = 0
+            self.timeouts = 0
+            self.total_wait = 0.0
+            self.max_wait = 0.0
+
+    def record(self, wait, timed_out=False):
+        with self._lock:
+            self.checkouts += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+            if timed_out:
+                self.timeouts += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'total_wait_seconds': self.total_wait,
+                'max_wait_seconds': self.max_wait,
+                'avg_wait_seconds': self.total_wait / self.checkouts if self.checkouts else 0.0,
+            }
+
+
+pool_metrics = PoolMetrics()
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that reports checkout wait times to ``pool_metrics``."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except Exception:
+            pool_metrics.record(time.perf_counter() - started, timed_out=True)
+            raise
+        pool_metrics.record(time.perf_counter() - started)
+        return connection
+
+
+def engine_settings(url):
+    """The preset for ``url``'s backend with DB_* environment overrides applied."""
+    backend = make_url(url).get_backend_name()
+    settings = dict(PRESETS.get(backend, PRESETS['postgresql']))
+    for key, (env_name, convert) in ENV_OVERRIDES.items():
+        value = os.getenv(env_name)
+        if value not in (None, ''):
+            settings[key] = convert(value)
+    return backend, settings
+
+
+def _set_sqlite_pragmas(settings):
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute(f"PRAGMA journal_mode = {settings['journal_mode']}")
+            cursor.execute(f"PRAGMA synchronous = {settings['synchronous']}")
+            cursor.execute(f"PRAGMA mmap_size = {int(settings['mmap_size'])}")
+        finally:
+            cursor.close()
+    return on_connect
+
+
+def build_engine(url):
+    backend, settings = engine_settings(url)
+    parsed = make_url(url)
+    options = {
+        'query_cache_size': settings['query_cache_size'],
+        'echo': os.getenv('DB_ECHO', '') in ('1', 'true'),
+    }
+    connect_args = {}
+
+    in_memory = backend == 'sqlite' and parsed.database in (None, '', ':memory:')
+    if not in_memory:
+        options.update(
+            poolclass=TimedQueuePool,
+            pool_size=settings['pool_size'],
+            max_overflow=settings['max_overflow'],
+            pool_timeout=settings['pool_timeout'],
+            pool_recycle=settings['pool_recycle'],
+            pool_pre_ping=settings['pool_pre_ping'],
+        )
+
+    if backend == 'sqlite':
+        connect_args['check_same_thread'] = False
+        # sqlite3's timeout is SQLite's busy_timeout: wait for locks instead of failing at once
+        connect_args['timeout'] = settings['busy_timeout_ms'] / 1000
+    elif backend == 'postgresql':
+        if settings['statement_timeout_ms']:
+            connect_args['options'] = f"-c statement_timeout={int(settings['statement_timeout_ms'])}"
+        if parsed.get_driver_name() == 'psycopg':
+            connect_args['prepare_threshold'] = settings['prepare_threshold']
+
+    engine = create_engine(url, connect_args=connect_args, **options)
+    if backend == 'sqlite' and not in_memory:
+        event.listen(engine, 'connect', _set_sqlite_pragmas(settings))
+    return engine
+
+
+# Async driver for each backend's sync URL
+ASYNC_DRIVERS = {
+    'sqlite': 'sqlite+aiosqlite',
+    'postgresql': 'postgresql+asyncpg',
+}
+
+
+def async_url(url):
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.get_backend_name())
+    return parsed.set(drivername=driver) if driver else parsed
+
+
+def build_async_engine(url):
+    # Imported here so the sync app doesn't need the asyncio extras installed
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    backend, settings = engine_settings(url)
+    parsed = async_url(url)
+    options = {'query_cache_size': settings['query_cache_size']}
+    connect_args = {}
+
+    in_memory = backend == 'sqlite' and parsed.database in (None, '', ':memory:')
+    if not in_memory:
+        options.update(
+            pool_size=settings['pool_size'],
+            max_overflow=settings['max_overflow'],
+            pool_timeout=settings['pool_timeout'],
+            pool_recycle=settings['pool_recycle'],
+            pool_pre_ping=settings['pool_pre_ping'],
+        )
+
+    if backend == 'sqlite':
+        connect_args['check_same_thread'] = False
+        connect_args['timeout'] = settings['busy_timeout_ms'] / 1000
+    elif backend == 'postgresql' and settings['statement_timeout_ms']:
+        # asyncpg takes server settings directly rather than a libpq options string
+        connect_args['server_settings'] = {'statement_timeout': str(int(settings['statement_timeout_ms']))}
+
+    engine = create_async_engine(parsed, connect_args=connect_args, **options)
+    if backend == 'sqlite' and not in_memory:
+        event.listen(engine.sync_engine, 'connect', _set_sqlite_pragmas(settings))
+    return engine
@@ -0,0 +1,270 @@
+"""Bulk import of bank transaction exports (CSV or OFX/QFX).
+
+Files are parsed as a stream in chunks, validated row by row, and inserted with one
+executemany INSERT per chunk inside a single database transaction. The account balance
+is adjusted once, by the total of the imported amounts, before that transaction commits.
+
+Command line:
+    python importer.py user@example.com statement.csv [--format csv|ofx] [--chunk-size 5000]
+"""
+import argparse
+import csv
+import io
+import math
+import os
+import sys
+from datetime import datetime
+
+from sqlalchemy import func, insert, update
+
+import balance_trend
+from database import get_db, get_user_id, user_cache
+from models import Transaction, User
+from money import cents_array, from_cents
+
+CHUNK_SIZE = 5000
+MAX_REPORTED_ERRORS = 50
+
+DATE_FORMATS = ('%Y-%m-%d', '%m/%d/%Y', '%m/%d/%y', '%Y/%m/%d', '%Y%m%d', '%d-%b-%Y')
+
+# Header aliases seen in common bank exports, matched case-insensitively
+CSV_COLUMNS = {
+    'date': ('date', 'transaction date', 'posting date', 'posted date', 'post date'),
+    'description': ('description', 'payee', 'name', 'memo', 'details', 'merchant'),
+    'amount': ('amount', 'transaction amount'),
+    'debit': ('debit', 'withdrawal', 'withdrawals', 'money out'),
+    'credit': ('credit', 'deposit', 'deposits', 'money in'),
+    'type': ('type', 'transaction type'),
+    'notes': ('notes', 'note', 'category'),
+}
+
+
+class TransactionImportError(ValueError):
+    """Raised when a file can't be imported at all (unknown format or missing columns)."""
+
+
+def _parse_date(value):
+    value = (value or '').strip()
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f"unrecognised date {value!r}")
+
+
+def _parse_amount(value):
+    value = (value or '').strip().replace('$', '').replace(',', '')
+    if not value:
+        return 0.0
+    # Accounting-style negatives: (12.34)
+    if value.startswith('(') and value.endswith(')'):
+        value = '-' + value[1:-1]
+    amount = float(value)
+    if not math.isfinite(amount):
+        raise ValueError(f"invalid amount {value!r}")
+    return amount
+
+
+def _transaction(user_id, date, description, amount, kind=None, notes=''):
+    description = (description or '').strip()
+    if not description:
+        raise ValueError("missing description")
+    kind = (kind or '').strip().lower()
+    # Bank exports often report debits as positive numbers alongside a type column
+    if kind.startswith('debit') and amount > 0:
+        amount = -amount
+    return {
+        'user_id': user_id,
+        'date': date,
+        'description': description,
+        'amount': round(amount, 2),
+        'type': 'credit' if amount >= 0 else 'debit',
+        'notes': (notes or '').strip(),
+    }
+
+
+def _resolve_columns(fieldnames):
+    by_name = {name.strip().lower(): name for name in fieldnames or [] if name}
+    columns = {}
+    for key, aliases in CSV_COLUMNS.items():
+        for alias in aliases:
+            if alias in by_name:
+                columns[key] = by_name[alias]
+                break
+    if 'date' not in columns or 'description' not in columns:
+        raise TransactionImportError("CSV needs a date and a description column")
+    if 'amount' not in columns and not ('debit' in columns or 'credit' in columns):
+        raise TransactionImportError("CSV needs an amount column (or debit/credit columns)")
+    return columns
+
+
+def iter_csv(stream, user_id, errors):
+    """Yield (line_number, transaction) for each valid CSV row; invalid rows go to ``errors``."""
+    reader = csv.DictReader(stream)
+    columns = _resolve_columns(reader.fieldnames)
+    for row in reader:
+        line = reader.line_num
+        try:
+            if 'amount' in columns:
+                amount = _parse_amount(row.get(columns['amount']))
+            else:
+                amount = _parse_amount(row.get(columns.get('credit'))) - abs(_parse_amount(row.get(columns.get('debit'))))
+            yield line, _transaction(
+                user_id,
+                _parse_date(row.get(columns['date'])),
+                row.get(columns['description']),
+                amount,
+                row.get(columns['type']) if 'type' in columns else None,
+                row.get(columns['notes']) if 'notes' in columns else '',
+            )
+        except (ValueError, TypeError) as e:
+            errors.append((line, str(e)))
+
+
+def _ofx_tokens(stream):
+    # OFX 1.x is SGML (closing tags optional), OFX 2.x is XML; either may put the whole
+    # statement on one line, so tokenise on '<' rather than by line.
+    pending = ''
+    for chunk in iter(lambda: stream.read(64 * 1024), ''):
+        parts = (pending + chunk).split('<')
+        pending = parts.pop()
+        for part in parts:
+            if part:
+                yield part
+    if pending:
+        yield pending
+
+
+def iter_ofx(stream, user_id, errors):
+    """Yield (index, transaction) for each <STMTTRN> block; invalid blocks go to ``errors``."""
+    current = None
+    index = 0
+    for token in _ofx_tokens(stream):
+        tag, _, value = token.partition('>')
+        tag = tag.strip().upper()
+        if tag == 'STMTTRN':
+            current = {}
+        elif tag == '/STMTTRN' and current is not None:
+            index += 1
+            try:
+                posted = current.get('DTPOSTED', '')[:8]
+                yield index, _transaction(
+                    user_id,
+                    _parse_date(posted),
+                    current.get('NAME') or current.get('MEMO'),
+                    _parse_amount(current.get('TRNAMT')),
+                    None,
+                    current.get('MEMO', '') if current.get('NAME') else '',
+                )
+            except (ValueError, TypeError) as e:
+                errors.append((index, str(e)))
+            current = None
+        elif current is not None and not tag.startswith('/'):
+            current[tag] = value.strip()
+
+
+def detect_format(filename):
+    extension = os.path.splitext(filename or '')[1].lower()
+    if extension in ('.ofx', '.qfx'):
+        return 'ofx'
+    if extension in ('.csv', '.txt', ''):
+        return 'csv'
+    raise TransactionImportError(f"Unsupported file type {extension!r}; expected CSV or OFX")
+
+
+def import_transactions(user_id, stream, file_format='csv', chunk_size=CHUNK_SIZE):
+    """Import every valid transaction in ``stream`` (a text file object) for ``user_id``.
+
+    Returns a dict with ``imported`` (row count), ``total`` (sum of amounts), ``balance``
+    (the account balance afterwards) and ``errors`` (up to MAX_REPORTED_ERRORS
+    ``(line, message)`` pairs, plus ``error_count``). Nothing is written if the user
+    doesn't exist or the insert fails.
+    """
+    errors = []
+    rows = iter_ofx(stream, user_id, errors) if file_format == 'ofx' else iter_csv(stream, user_id, errors)
+
+    db = get_db()
+    try:
+        if db.query(User.id).filter(User.id == user_id).scalar() is None:
+            raise TransactionImportError("User not found")
+        imported = 0
+        total_cents = 0
+        chunk = []
+        for _, transaction in rows:
+            chunk.append(transaction)
+            if len(chunk) >= chunk_size:
+                db.execute(insert(Transaction), chunk)
+                imported += len(chunk)
+                total_cents += int(cents_array([t['amount'] for t in chunk]).sum())
+                chunk = []
+        if chunk:
+            db.execute(insert(Transaction), chunk)
+            imported += len(chunk)
+            total_cents += int(cents_array([t['amount'] for t in chunk]).sum())
+
+        balance = db.execute(
+            update(User)
+            .where(User.id == user_id)
+            .values(balance=func.coalesce(User.balance, 0.0) + from_cents(total_cents))
+            .returning(User.balance)
+        ).scalar()
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    # Too many rows to patch in one by one; let the next read reload the snapshot. The
+    # trend cache goes too: a concurrent add_transaction may have committed a higher id.
+    user_cache.invalidate(user_id)
+    balance_trend.invalidate(user_id)
+    return {
+        'imported': imported,
+        'total': from_cents(total_cents),
+        'balance': balance,
+        'errors': errors[:MAX_REPORTED_ERRORS],
+        'error_count': len(errors),
+    }
+
+
+def import_file(user_id, binary_stream, filename, file_format=None, chunk_size=CHUNK_SIZE):
+    """Import an uploaded/opened binary file, decoding it as UTF-8 (BOM tolerated)."""
+    file_format = file_format or detect_format(filename)
+    text = io.TextIOWrapper(binary_stream, encoding='utf-8-sig', errors='replace', newline='')
+    try:
+        return import_transactions(user_id, text, file_format, chunk_size)
+    finally:
+        text.detach()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import a bank CSV/OFX export into a FinanceTracker account.")
+    parser.add_argument("email", help="email of the account to import into")
+    parser.add_argument("path", help="CSV or OFX/QFX file")
+    parser.add_argument("--format", choices=("csv", "ofx"), help="override detection by file extension")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    user_id = get_user_id(args.email)
+    if user_id is None:
+        print(f"No account for {args.email}", file=sys.stderr)
+        return 1
+    try:
+        with open(args.path, 'rb') as f:
+            result = import_file(user_id, f, args.path, args.format, args.chunk_size)
+    except TransactionImportError as e:
+        print(f"Import failed: {e}", file=sys.stderr)
+        return 1
+
+    print(f"Imported {result['imported']} transactions (net {result['total']:,.2f}); new balance {result['balance']:,.2f}")
+    if result['error_count']:
+        print(f"Skipped {result['error_count']} invalid rows:", file=sys.stderr)
+        for line, message in result['errors']:
+            print(f"  line {line}: {message}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
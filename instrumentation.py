@@ -0,0 +1,265 @@
+"""Opt-in timing of reruns, SQL queries, database.py calls and section renders.
+
+Enable with INSTRUMENT=1. Each Streamlit rerun (``with rerun(page):`` in app.py) then
+collects:
+
+    queries          count and time of every statement run on models.engine
+    functions        calls and time per public database.py function (inclusive)
+    sections         render time of the dashboard section shown
+
+When a rerun ends, one JSON line goes to the ``instrumentation`` logger; reruns slower
+than INSTRUMENT_SLOW_MS (default 1000) are logged as warnings. The same numbers feed
+process-wide histograms, written in Prometheus text format to INSTRUMENT_METRICS_FILE
+(if set; at most once a second) for a node-exporter textfile collector or similar.
+``render_debug_panel`` shows the current rerun's numbers in the sidebar.
+
+Statements issued from database_async's event loop thread aren't attributed to a rerun;
+they still count towards the process-wide query metrics.
+"""
+import contextvars
+import functools
+import inspect
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+ENABLED = os.getenv("INSTRUMENT", "") in ("1", "true")
+METRICS_FILE = os.getenv("INSTRUMENT_METRICS_FILE")
+SLOW_RERUN_MS = float(os.getenv("INSTRUMENT_SLOW_MS", "1000"))
+WRITE_INTERVAL = 1.0
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+logger = logging.getLogger(__name__)
+
+
+class Histogram:
+    __slots__ = ('counts', 'count', 'sum')
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                self.counts[i] += 1
+
+
+class Registry:
+    """Process-wide histograms keyed by metric name and label values."""
+
+    HELP = {
+        'financetracker_rerun_seconds': "Wall time of a Streamlit rerun",
+        'financetracker_rerun_queries': "SQL statements per rerun",
+        'financetracker_query_seconds': "Time per SQL statement",
+        'financetracker_function_seconds': "Time per database.py call",
+        'financetracker_section_render_seconds': "Render time per dashboard section",
+    }
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._last_write = 0.0
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def render(self):
+        """Prometheus text exposition of every histogram, plus pool checkout counters."""
+        with self._lock:
+            items = sorted(self._histograms.items())
+            lines = []
+            seen = set()
+            for (name, labels), histogram in items:
+                if name not in seen:
+                    seen.add(name)
+                    lines.append(f"# HELP {name} {self.HELP.get(name, name)}")
+                    lines.append(f"# TYPE {name} histogram")
+                label_text = ",".join(f'{key}="{value}"' for key, value in labels)
+                prefix = label_text + "," if label_text else ""
+                # observe() already counts a value in every bucket it fits, so these are cumulative
+                for bound, count in zip(BUCKETS, histogram.counts):
+                    lines.append(f'{name}_bucket{{{prefix}le="{bound}"}} {count}')
+                lines.append(f'{name}_bucket{{{prefix}le="+Inf"}} {histogram.count}')
+                suffix = f"{{{label_text}}}" if label_text else ""
+                lines.append(f"{name}_sum{suffix} {histogram.sum:.6f}")
+                lines.append(f"{name}_count{suffix} {histogram.count}")
+
+        from db_config import pool_metrics
+        pool = pool_metrics.snapshot()
+        lines.append("# TYPE financetracker_pool_checkouts_total counter")
+        lines.append(f"financetracker_pool_checkouts_total {pool['checkouts']}")
+        lines.append("# TYPE financetracker_pool_timeouts_total counter")
+        lines.append(f"financetracker_pool_timeouts_total {pool['timeouts']}")
+        lines.append("# TYPE financetracker_pool_wait_seconds_total counter")
+        lines.append(f"financetracker_pool_wait_seconds_total {pool['total_wait_seconds']:.6f}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path, force=False):
+        now = time.monotonic()
+        with self._lock:
+            if not force and now - self._last_write < WRITE_INTERVAL:
+                return
+            self._last_write = now
+        # Write-then-rename so a scraper never reads a half-written file
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "w") as f:
+            f.write(self.render())
+        os.replace(temporary, path)
+
+
+registry = Registry()
+
+
+class RerunStats:
+    """What one rerun spent its time on so far."""
+
+    def __init__(self, page):
+        self.page = page
+        self.started = time.perf_counter()
+        self.elapsed = None
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.functions = {}  # name -> [calls, seconds]
+        self.sections = {}  # name -> seconds
+
+    def add_call(self, name, seconds):
+        entry = self.functions.setdefault(name, [0, 0.0])
+        entry[0] += 1
+        entry[1] += seconds
+
+    def as_dict(self):
+        return {
+            'page': self.page,
+            'rerun_ms': round((self.elapsed or time.perf_counter() - self.started) * 1000, 2),
+            'queries': self.queries,
+            'query_ms': round(self.query_seconds * 1000, 2),
+            'functions': {name: {'calls': calls, 'ms': round(seconds * 1000, 2)} for name, (calls, seconds) in self.functions.items()},
+            'sections': {name: round(seconds * 1000, 2) for name, seconds in self.sections.items()},
+        }
+
+
+_current = contextvars.ContextVar('instrumentation_rerun', default=None)
+
+
+def current():
+    """The RerunStats being collected in this script thread, or None."""
+    return _current.get()
+
+
+@contextmanager
+def rerun(page):
+    if not ENABLED:
+        yield None
+        return
+    stats = RerunStats(page)
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        # Also runs when st.rerun()/st.stop() end the script early
+        _current.reset(token)
+        stats.elapsed = time.perf_counter() - stats.started
+        registry.observe('financetracker_rerun_seconds', stats.elapsed, page=page)
+        registry.observe('financetracker_rerun_queries', stats.queries, page=page)
+        record = json.dumps(stats.as_dict())
+        if stats.elapsed * 1000 > SLOW_RERUN_MS:
+            logger.warning("slow rerun %s", record)
+        else:
+            logger.info("rerun %s", record)
+        if METRICS_FILE:
+            try:
+                registry.write(METRICS_FILE)
+            except OSError:
+                logger.exception("Could not write %s", METRICS_FILE)
+
+
+@contextmanager
+def section(name):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        if ENABLED:
+            seconds = time.perf_counter() - started
+            registry.observe('financetracker_section_render_seconds', seconds, section=name)
+            stats = current()
+            if stats is not None:
+                stats.sections[name] = stats.sections.get(name, 0.0) + seconds
+
+
+def timed(fn, name=None):
+    name = name or fn.__name__
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            seconds = time.perf_counter() - started
+            registry.observe('financetracker_function_seconds', seconds, function=name)
+            stats = current()
+            if stats is not None:
+                stats.add_call(name, seconds)
+    return wrapper
+
+
+def instrument_functions(namespace, module_name):
+    """Wrap the public functions defined in a module (pass its ``globals()``) with ``timed``."""
+    if not ENABLED:
+        return
+    for name, obj in list(namespace.items()):
+        if inspect.isfunction(obj) and obj.__module__ == module_name and not name.startswith('_'):
+            namespace[name] = timed(obj, name)
+
+
+def install_query_hooks(engine):
+    if not ENABLED:
+        return
+    from sqlalchemy import event
+
+    # The start time rides on the statement's execution context rather than a per-connection
+    # stack: a statement that raises never reaches after_cursor_execute, and its context is
+    # simply dropped with it.
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context.instrumentation_started = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        seconds = time.perf_counter() - context.instrumentation_started
+        registry.observe('financetracker_query_seconds', seconds)
+        stats = current()
+        if stats is not None:
+            stats.queries += 1
+            stats.query_seconds += seconds
+
+
+def render_debug_panel():
+    """Sidebar expander with the current rerun's numbers (call after the page renders)."""
+    stats = current()
+    if stats is None:
+        return
+    import streamlit as st
+
+    data = stats.as_dict()
+    with st.sidebar.expander("Debug: timings"):
+        st.caption(f"Rerun so far: {data['rerun_ms']:.1f} ms")
+        st.caption(f"SQL: {data['queries']} queries, {data['query_ms']:.1f} ms")
+        for name, ms in data['sections'].items():
+            st.caption(f"Section {name}: {ms:.1f} ms")
+        slowest = sorted(data['functions'].items(), key=lambda item: item[1]['ms'], reverse=True)[:8]
+        for name, entry in slowest:
+            st.caption(f"`{name}` ×{entry['calls']}: {entry['ms']:.1f} ms")
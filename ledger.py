@@ -0,0 +1,138 @@
+"""Columnar per-user expenses, debts and investments, and transaction pages.
+
+A user's snapshot (see ``snapshot.UserSnapshot``) holds each of these collections as one
+pandas DataFrame, built straight from the query's column tuples rather than from per-row
+dicts. Money columns hold int64 cents (``*_cents``), so totals are exact integer sums and
+views divide once by 100. Sections render the frames with ``st.column_config`` number
+formats, so no per-row Python formatting happens on the server.
+
+Writes don't reload a collection: the ``database`` mutators patch the cached frame with
+the row their statement RETURNs (``upsert`` / ``without``). Each patch builds a new frame,
+so a session still reading the old one is unaffected. Transactions are not held here:
+history stays paged in the database, and ``database.transaction_page`` builds each page
+with ``transaction_frame``, so a page costs the same at any history size.
+
+pandas is imported by the functions that build frames, not at module level: ``database``
+imports this module, and the login path must stay free of pandas (see
+benchmarks/import_time.py).
+"""
+from sqlalchemy import BigInteger, func, select, type_coerce
+
+from models import Debt, Expense, Investment
+from money import cents_array, from_cents, to_cents
+
+
+def _cents(column):
+    # Raw BIGINT cents instead of Money's float conversion; NULL counts as zero
+    return func.coalesce(type_coerce(column, BigInteger), 0)
+
+
+# name -> (column expression, dtype) per collection, in query order. A ``*_cents`` field
+# holds the row dicts' dollar field of the same name without the suffix.
+EXPENSE_FIELDS = {
+    'id': (Expense.id, 'int64'),
+    'date': (Expense.date, 'datetime64[s]'),
+    'name': (Expense.name, 'str'),
+    'category': (Expense.category, 'str'),
+    'cost_cents': (_cents(Expense.cost), 'int64'),
+}
+DEBT_FIELDS = {
+    'id': (Debt.id, 'int64'),
+    'name': (Debt.name, 'str'),
+    'amount_owed_cents': (_cents(Debt.amount_owed), 'int64'),
+    'interest_rate': (Debt.interest_rate, 'float64'),
+    'monthly_pay_cents': (_cents(Debt.monthly_pay), 'int64'),
+}
+INVESTMENT_FIELDS = {
+    'id': (Investment.id, 'int64'),
+    'name': (Investment.name, 'str'),
+    'symbol': (Investment.symbol, 'str'),
+    'risk_level': (Investment.risk_level, 'str'),
+    'quantity': (Investment.quantity, 'float64'),
+    'amount_cents': (_cents(Investment.amount), 'int64'),
+}
+TRANSACTION_DTYPES = {
+    'id': 'int64',
+    'date': 'datetime64[s]',
+    'description': 'str',
+    'amount': 'float64',
+    'type': 'str',
+    'notes': 'str',
+}
+
+# snapshot key -> (model, fields)
+COLLECTIONS = {
+    'expenses': (Expense, EXPENSE_FIELDS),
+    'debts': (Debt, DEBT_FIELDS),
+    'investments': (Investment, INVESTMENT_FIELDS),
+}
+
+
+def _frame(rows, dtypes):
+    import pandas as pd
+
+    # Column-wise: one zip over the row tuples, then one typed column each
+    columns = list(zip(*rows)) or [()] * len(dtypes)
+    return pd.DataFrame({name: pd.Series(values, dtype=dtype) for (name, dtype), values in zip(dtypes.items(), columns)})
+
+
+def statement(collection, user_id):
+    """SELECT of one user's ``collection`` in frame column order, oldest first."""
+    model, fields = COLLECTIONS[collection]
+    return select(*(column for column, _ in fields.values())).where(model.user_id == user_id).order_by(model.id)
+
+
+def build(collection, rows):
+    """The frame of ``collection`` from the rows ``statement`` returned."""
+    return _frame(rows, {name: dtype for name, (_, dtype) in COLLECTIONS[collection][1].items()})
+
+
+def load(db, user_id):
+    """{collection: frame} for each of COLLECTIONS, one query each."""
+    return {collection: build(collection, db.execute(statement(collection, user_id)).all()) for collection in COLLECTIONS}
+
+
+def _values(collection, row):
+    # A row dict as the database mutators return it, as one tuple in frame column order
+    values = []
+    for name in COLLECTIONS[collection][1]:
+        if name.endswith('_cents'):
+            values.append(to_cents(row.get(name[:-len('_cents')]) or 0))
+        elif name == 'date':
+            values.append(row.get('date') or None)  # '' when undated
+        else:
+            values.append(row.get(name))
+    return tuple(values)
+
+
+def upsert(frame, collection, row):
+    """A copy of ``frame`` with ``row`` (a mutator's row dict) added, or replacing the one with its id."""
+    import pandas as pd
+
+    kept = frame[frame['id'] != row['id']]
+    return pd.concat([kept, build(collection, [_values(collection, row)])], ignore_index=True).sort_values('id', ignore_index=True)
+
+
+def without(frame, row_id):
+    """A copy of ``frame`` without the row ``row_id``."""
+    return frame[frame['id'] != row_id].reset_index(drop=True)
+
+
+def column_total(frame, column):
+    """Exact sum of a ``*_cents`` column, in dollars."""
+    return from_cents(int(frame[column].sum()))
+
+
+def category_totals(expenses):
+    """{category: dollars} of an expenses frame, grouped by trimmed lower-case category like
+    ``database.get_expense_totals``; rows without a category are left out."""
+    categories = expenses['category'].str.strip().str.lower()
+    sums = expenses['cost_cents'].groupby(categories).sum()
+    return {category: from_cents(int(cents)) for category, cents in sums.items() if category}
+
+
+def transaction_frame(rows):
+    """A page of ``database.TRANSACTION_COLUMNS`` rows as a frame, plus an ``amount_cents`` column."""
+    page = _frame(rows, TRANSACTION_DTYPES)
+    page['amount_cents'] = cents_array(page['amount'])
+    return page
@@ -1,5 +1,6 @@
 import streamlit as st
 from database import login_user
+from throttle import LoginThrottled
 
 def show_login_page():
     st.markdown("<h1 style='text-align: center;'>MyBank</h1>", unsafe_allow_html=True)
@@ -20,18 +21,22 @@ def show_login_page():
             login_button = st.form_submit_button("Login", width="stretch", type="primary")
             
             if login_button:
-                if not email or not password:
-                    st.error("Please enter both email and password")
-                elif login_user(email, password, st.session_state.users_db):
-                    st.session_state.logged_in = True
-                    st.session_state.current_user = email
-                    st.session_state.page = 'dashboard'
-                    from database import load_users
-                    st.session_state.users_db = load_users()
-                    st.success("Login successful!")
-                    st.rerun()
+                try:
+                    user_id = login_user(email, password, client=st.context.ip_address) if email and password else None
+                except LoginThrottled as e:
+                    st.error(str(e))
                 else:
-                    st.error("Invalid email or password")
+                    if not email or not password:
+                        st.error("Please enter both email and password")
+                    elif user_id is not None:
+                        st.session_state.logged_in = True
+                        st.session_state.current_user = email
+                        st.session_state.user_id = user_id
+                        st.session_state.page = 'dashboard'
+                        st.success("Login successful!")
+                        st.rerun()
+                    else:
+                        st.error("Invalid email or password")
         
         st.write("")
         st.markdown("---")
@@ -0,0 +1,252 @@
+"""Versioned schema migrations.
+
+The applied version is recorded in the ``schema_version`` table. Each migration runs in
+its own transaction together with the row that records it. Migrations are written to be
+safe on databases that predate this table (created by the old create_all-at-startup), so
+those are brought up to date the same way as new ones.
+
+Run once per deploy (or let the app do it on first start, see ``ensure_schema``):
+
+    python migrations.py init-db    # create a new database at the latest version
+    python migrations.py migrate    # apply pending migrations
+    python migrations.py status     # show current and latest version
+"""
+import argparse
+import logging
+import os
+import sys
+import threading
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, false, func, inspect, select, text
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+from models import MONTHLY, Base, Budget, Expense, Investment, Transaction, User, engine
+from money import Money
+
+logger = logging.getLogger(__name__)
+
+BULK_CHUNK_SIZE = 10000
+
+version_metadata = MetaData()
+schema_version = Table(
+    "schema_version",
+    version_metadata,
+    Column("version", Integer, primary_key=True),
+    Column("description", String),
+    Column("applied_at", DateTime, server_default=func.now()),
+)
+
+
+def _create_index(conn, index):
+    # IF NOT EXISTS rather than checkfirst: SQLAlchemy can't reflect expression indexes
+    conn.execute(CreateIndex(index, if_not_exists=True))
+
+
+def _create_base_tables(conn):
+    Base.metadata.create_all(bind=conn, checkfirst=True)
+
+
+def _merge_duplicate_expenses(conn, key):
+    # Folds expenses that share ``key`` (a unique index's expressions) into the oldest one,
+    # with their costs summed, so the index can be created without losing any spending
+    expenses = Expense.__table__
+    groups = conn.execute(select(func.min(expenses.c.id), *key).group_by(*key).having(func.count() > 1)).all()
+    merged = 0
+    for keep_id, *values in groups:
+        if any(value is None for value in values):
+            continue  # NULLs never collide in a unique index
+        same = [expression == value for expression, value in zip(key, values)]
+        # Summed in SQL, so the stored values are copied whatever unit they are in
+        total = select(func.sum(expenses.c.cost)).where(*same).scalar_subquery()
+        conn.execute(expenses.update().where(expenses.c.id == keep_id).values(cost=total))
+        merged += conn.execute(expenses.delete().where(expenses.c.id != keep_id, *same)).rowcount
+    if merged:
+        logger.warning("Merged %s duplicate expenses into the oldest of each group", merged)
+
+
+def _create_expense_unique_index(conn):
+    # Version 2's undated index, spelled out since models.py now defines the dated one
+    _merge_duplicate_expenses(conn, [Expense.user_id, func.lower(Expense.name), func.lower(Expense.category)])
+    conn.execute(text('CREATE UNIQUE INDEX IF NOT EXISTS uq_expenses_user_name_category ON expenses (user_id, lower(name), lower(category))'))
+
+
+def _skip(conn):
+    pass
+
+
+def _date_expense_unique_index(conn):
+    # Same name and category on another day is a new expense, not a duplicate
+    conn.execute(text('DROP INDEX IF EXISTS uq_expenses_user_name_category'))
+    index = next(i for i in Expense.__table__.indexes if i.name == "uq_expenses_user_name_category_date")
+    _merge_duplicate_expenses(conn, list(index.expressions))
+    _create_index(conn, index)
+
+
+def _create_transaction_keyset_index(conn):
+    index = next(i for i in Transaction.__table__.indexes if i.name == "ix_transactions_user_date_id")
+    _create_index(conn, index)
+
+
+def _money_columns_to_cents(conn):
+    inspector = inspect(conn)
+    for table in Base.metadata.sorted_tables:
+        money_columns = [column.name for column in table.columns if isinstance(column.type, Money)]
+        if not money_columns:
+            continue
+        reflected = {column['name']: column['type'] for column in inspector.get_columns(table.name)}
+        for name in money_columns:
+            # Tables created since Money was introduced already hold BIGINT cents
+            if name not in reflected or isinstance(reflected[name], Integer):
+                continue
+            if conn.dialect.name == 'postgresql':
+                conn.execute(text(f'ALTER TABLE {table.name} ALTER COLUMN {name} TYPE BIGINT USING round({name} * 100)::bigint'))
+            else:
+                # SQLite can't change a column's declared type. The REAL column stores
+                # whole-number cents, which doubles represent exactly (below 2**53), and
+                # Money rounds them back to integers on read.
+                conn.execute(text(f'UPDATE {table.name} SET {name} = CAST(round({name} * 100) AS INTEGER) WHERE {name} IS NOT NULL'))
+
+
+def _add_missing_columns(conn, table, names):
+    existing = {column['name'] for column in inspect(conn).get_columns(table.name)}
+    for name in names:
+        if name not in existing:
+            column = table.columns[name]
+            column_type = column.type.compile(dialect=conn.dialect)
+            conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {name} {column_type}'))
+
+
+def _add_investment_holding_columns(conn):
+    _add_missing_columns(conn, Investment.__table__, ('symbol', 'quantity'))
+
+
+def _add_expense_dates(conn):
+    _add_missing_columns(conn, Expense.__table__, ('date',))
+    # Undated expenses used to count against every month's budget; file them under the
+    # month of the upgrade, the period they were being compared with
+    conn.execute(Expense.__table__.update().where(Expense.date.is_(None)).values(date=func.current_date()))
+    _create_index(conn, next(i for i in Expense.__table__.indexes if i.name == "ix_expenses_user_date"))
+
+
+def _move_budgets_to_table(conn):
+    budgets = Budget.__table__
+    budgets.create(conn, checkfirst=True)
+    users = User.__table__
+    rows = []
+    for user_id, budget in conn.execute(select(users.c.id, users.c.budget).where(users.c.budget.isnot(None))):
+        # Keys that normalize alike ("Rent", "rent ") collapse into one row; the last wins
+        amounts = {}
+        for category, amount in (budget or {}).items():
+            category = str(category).strip().lower()
+            try:
+                amounts[category] = float(amount)
+            except (TypeError, ValueError):
+                logger.warning("Skipping budget %r = %r for user %s: not a number", category, amount, user_id)
+        rows.extend({'user_id': user_id, 'category': category, 'period': MONTHLY, 'amount': amount} for category, amount in amounts.items() if category)
+    for start in range(0, len(rows), BULK_CHUNK_SIZE):
+        conn.execute(budgets.insert(), rows[start:start + BULK_CHUNK_SIZE])
+
+
+# (version, description, function(connection)); append only, never renumber
+MIGRATIONS = [
+    (1, "base tables", _create_base_tables),
+    (2, "unique expenses per user/name/category", _create_expense_unique_index),
+    (3, "transactions (user_id, date, id) keyset index", _create_transaction_keyset_index),
+    (4, "money columns as integer cents", _money_columns_to_cents),
+    (5, "investment symbol and quantity", _add_investment_holding_columns),
+    (6, "expense dates", _add_expense_dates),
+    (7, "budgets table (from users.budget JSON)", _move_budgets_to_table),
+    # Was a retry of version 2's index; version 9 replaces that index, merging only
+    # same-day duplicates, so merging across dates first would lose spending months
+    (8, "unique expenses index, merging duplicates", _skip),
+    (9, "unique expenses per user/name/category/date", _date_expense_unique_index),
+]
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def current_version(conn):
+    if not inspect(conn).has_table(schema_version.name):
+        return 0
+    return conn.execute(select(func.max(schema_version.c.version))).scalar() or 0
+
+
+def _lock(conn):
+    # Serialize migrating processes so each sees the versions the others committed
+    if conn.dialect.name == 'postgresql':
+        conn.execute(text("SELECT pg_advisory_xact_lock(hashtext('financetracker.migrations'))"))
+    else:
+        # A no-op UPDATE takes SQLite's write lock at the start of the transaction
+        conn.execute(schema_version.update().where(false()).values(description=None))
+
+
+def migrate(target=None):
+    """Apply pending migrations up to ``target`` (default: latest); returns the new version."""
+    target = LATEST_VERSION if target is None else target
+    with engine.begin() as conn:
+        # IF NOT EXISTS: a concurrent process may create it between a check and the CREATE
+        conn.execute(CreateTable(schema_version, if_not_exists=True))
+    for version, description, apply in MIGRATIONS:
+        if version > target:
+            break
+        with engine.begin() as conn:
+            _lock(conn)
+            if current_version(conn) >= version:
+                continue
+            logger.info("Applying migration %s: %s", version, description)
+            apply(conn)
+            conn.execute(schema_version.insert().values(version=version, description=description))
+    with engine.connect() as conn:
+        return current_version(conn)
+
+
+_schema_verified = False
+_schema_lock = threading.Lock()
+
+
+def ensure_schema():
+    """Check (and by default migrate) the schema once per process; later calls are free.
+
+    Streamlit re-runs app.py on every interaction, but modules stay imported, so after
+    the first successful check no page interaction issues DDL or catalog queries.
+    Set DB_AUTO_MIGRATE=0 to fail fast instead of migrating when the schema is behind.
+    """
+    global _schema_verified
+    if _schema_verified:
+        return
+    with _schema_lock:
+        if _schema_verified:
+            return
+        with engine.connect() as conn:
+            version = current_version(conn)
+        if version < LATEST_VERSION:
+            if os.getenv("DB_AUTO_MIGRATE", "1") in ("0", "false"):
+                raise RuntimeError(
+                    f"Database schema is at version {version}, expected {LATEST_VERSION}; "
+                    "run `python migrations.py migrate`"
+                )
+            migrate()
+        _schema_verified = True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="FinanceTracker schema migrations")
+    parser.add_argument("command", choices=("init-db", "migrate", "status"))
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    if args.command == "status":
+        with engine.connect() as conn:
+            print(f"schema version {current_version(conn)} (latest {LATEST_VERSION})")
+        return 0
+
+    if args.command == "init-db":
+        with engine.connect() as conn:
+            if current_version(conn):
+                print("Database already initialised; use `migrate` to apply pending migrations", file=sys.stderr)
+                return 1
+    print(f"schema version {migrate()} (latest {LATEST_VERSION})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
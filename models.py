@@ -1,6 +1,9 @@
-from sqlalchemy import create_engine, Column, Integer, String, Float, Date, Text, Enum as SAEnum, JSON
+from sqlalchemy import Column, Integer, String, Float, Date, Text, Enum as SAEnum, JSON, Index, func
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import sessionmaker, relationship
+from db_config import build_engine
+from money import Money
+import instrumentation
 from enum import Enum
 import os
 
@@ -10,10 +13,9 @@ if not DATABASE_URL:
     BASE_DIR = os.path.abspath(os.path.dirname(__file__))
     DATABASE_URL = f"sqlite:///{os.path.join(BASE_DIR, 'financetracker.db')}"
 
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {}
-)
+# Pool sizing, timeouts and SQLite pragmas come from db_config presets (overridable via DB_* env vars)
+engine = build_engine(DATABASE_URL)
+instrumentation.install_query_hooks(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
@@ -41,11 +43,19 @@ class User(Base):
     account_number = Column(String)
     routing_number = Column(String)
     account_type = Column(String)
-    balance = Column(Float, default=0.0)
+    balance = Column(Money, default=0.0)
     pay_rate = Column(SAEnum(PayRate), default=PayRate.monthly)
-    goal_budget = Column(Float, default=0.0)
-    income = Column(Float, default=0.0)
-    budget = Column(JSON, default=dict)
+    goal_budget = Column(Money, default=0.0)
+    income = Column(Money, default=0.0)
+    budget = Column(JSON, default=dict)  # legacy; moved to the budgets table by migration 7, no longer read
+
+    # Child tables reference users by a plain user_id column (no FK constraint), so the
+    # joins are spelled out. View-only: writes still go through the child models directly.
+    transactions = relationship("Transaction", primaryjoin="User.id == foreign(Transaction.user_id)", viewonly=True)
+    expenses = relationship("Expense", primaryjoin="User.id == foreign(Expense.user_id)", viewonly=True)
+    debts = relationship("Debt", primaryjoin="User.id == foreign(Debt.user_id)", viewonly=True)
+    investments = relationship("Investment", primaryjoin="User.id == foreign(Investment.user_id)", viewonly=True)
+    budgets = relationship("Budget", primaryjoin="User.id == foreign(Budget.user_id)", viewonly=True)
 
 class Transaction(Base):
     __tablename__ = "transactions"
@@ -54,10 +64,13 @@ class Transaction(Base):
     user_id = Column(Integer, index=True)
     date = Column(Date)
     description = Column(String)
-    amount = Column(Float)
+    amount = Column(Money)
     type = Column(String)
     notes = Column(Text)
 
+# Serves list_transactions' keyset pagination (newest first within a user)
+Index("ix_transactions_user_date_id", Transaction.user_id, Transaction.date.desc(), Transaction.id.desc())
+
 class Expense(Base):
     __tablename__ = "expenses"
 
@@ -65,7 +78,24 @@ class Expense(Base):
     user_id = Column(Integer, index=True)
     name = Column(String)
     category = Column(String)
-    cost = Column(Float)
+    cost = Column(Money)
+    date = Column(Date)  # when it was spent; budget periods are its calendar month
+
+# Serves budget_periods' per-month GROUP BY over a date range
+Index("ix_expenses_user_date", Expense.user_id, Expense.date)
+
+# One expense per user/name/category/date, names and categories compared
+# case-insensitively, so the same expense can recur on other days. An expression index,
+# so it works the same on Postgres and SQLite; add/update_expense rely on it to reject
+# duplicates atomically.
+Index(
+    "uq_expenses_user_name_category_date",
+    Expense.user_id,
+    func.lower(Expense.name),
+    func.lower(Expense.category),
+    Expense.date,
+    unique=True,
+)
 
 class Debt(Base):
     __tablename__ = "debts"
@@ -73,9 +103,9 @@ class Debt(Base):
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, index=True)
     name = Column(String)
-    amount_owed = Column(Float)
+    amount_owed = Column(Money)
     interest_rate = Column(Float)
-    monthly_pay = Column(Float)
+    monthly_pay = Column(Money)
 
 class Investment(Base):
     __tablename__ = "investments"
@@ -83,8 +113,28 @@ class Investment(Base):
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, index=True)
     name = Column(String)
-    amount = Column(Float)
+    amount = Column(Money)  # cost basis: what was paid for the holding
     risk_level = Column(String)
+    # Optional: ticker in the local price feed (see price_feed.py) and units held
+    symbol = Column(String)
+    quantity = Column(Float)
+
+# Budget.period of the recurring monthly amount, the only period the app sets so far
+MONTHLY = 'monthly'
+
+class Budget(Base):
+    __tablename__ = "budgets"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, nullable=False)
+    category = Column(String, nullable=False)  # trimmed and lower-cased, like expense totals
+    period = Column(String, nullable=False, default=MONTHLY)
+    amount = Column(Money, nullable=False)
+
+# One amount per user/category/period; update_user_budget_for_user upserts against it
+Index("uq_budgets_user_category_period", Budget.user_id, Budget.category, Budget.period, unique=True)
 
 def create_tables():
-    Base.metadata.create_all(bind=engine)
+    # Kept for callers that predate migrations.py; brings the schema to the latest version
+    from migrations import migrate
+    migrate()
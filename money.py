@@ -0,0 +1,62 @@
+"""Money values, stored and summed as integer cents.
+
+Columns declared ``Money`` hold BIGINT cents, so SUM() and balance updates are exact
+integer arithmetic on every backend (SQLite has no exact decimal type). Python code sees
+plain floats rounded to the cent, which is what the UI and pandas already use; anything that
+adds amounts together should do it in cents instead: ``to_cents`` / ``from_cents`` for
+single values, ``cents_array`` / ``total`` for many at once (one int64 NumPy array, not a
+Decimal per row).
+"""
+import math
+from decimal import ROUND_HALF_EVEN, Decimal
+
+from sqlalchemy import BigInteger
+from sqlalchemy.types import TypeDecorator
+
+
+def to_cents(value):
+    """Whole cents for a dollar amount (int, float, Decimal or numeric string)."""
+    if isinstance(value, int):
+        return value * 100
+    if isinstance(value, float):
+        if not math.isfinite(value):
+            raise ValueError(f"invalid amount {value!r}")
+        # Amounts entered to the cent are within 1e-6 of a whole number of cents here
+        return round(value * 100)
+    return int((Decimal(value) * 100).to_integral_value(ROUND_HALF_EVEN))
+
+
+def from_cents(cents):
+    # int / int is correctly rounded, so this is the float nearest the exact amount
+    return int(cents) / 100
+
+
+def cents_array(values):
+    """int64 cents for a sequence (or array) of dollar amounts, computed in one pass."""
+    import numpy as np
+
+    return np.rint(np.asarray(values, dtype=np.float64) * 100).astype(np.int64)
+
+
+def total(values):
+    """Exact sum of dollar amounts, rounded to the cent."""
+    return from_cents(int(cents_array(values).sum())) if len(values) else 0.0
+
+
+class Money(TypeDecorator):
+    """A dollar amount stored as BIGINT cents; binds and returns floats."""
+
+    impl = BigInteger
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return None if value is None else to_cents(value)
+
+    def process_result_value(self, value, dialect):
+        # round() also accepts REAL cents (SQLite tables from before the migration) and
+        # Postgres' NUMERIC result for SUM(bigint)
+        return None if value is None else from_cents(round(value))
+
+    @property
+    def python_type(self):
+        return float
@@ -0,0 +1,83 @@
+"""Password hashing and verification on a bounded worker pool.
+
+Hashes are deliberately slow, so they run on PASSWORD_HASH_WORKERS threads (default:
+up to 4, one per CPU) rather than on the Streamlit script thread that asked for them.
+hashlib's scrypt and PBKDF2 release the GIL while they work, so other sessions keep
+rerunning during a burst of logins. At most PASSWORD_HASH_MAX_PENDING calls (default
+4 per worker) may be queued or running at once; past that ``PasswordPoolBusy`` is
+raised instead of letting the queue, and every waiting login, grow without bound.
+
+PASSWORD_HASH_METHOD (a werkzeug method string, default ``scrypt``; e.g.
+``scrypt:65536:8:1`` or ``pbkdf2:sha256:1000000``) sets the cost of new hashes.
+``needs_rehash`` tells whether a stored hash was made with other settings, so logins
+can upgrade it transparently.
+"""
+import asyncio
+import atexit
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+HASH_METHOD = os.getenv("PASSWORD_HASH_METHOD", "scrypt")
+WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "0")) or min(4, os.cpu_count() or 1)
+MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "0")) or 4 * WORKERS
+
+
+class PasswordPoolBusy(Exception):
+    """Raised when MAX_PENDING hash calls are already queued or running."""
+
+
+_executor = None
+_executor_lock = threading.Lock()
+_pending = threading.BoundedSemaphore(MAX_PENDING)
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix="password-hash")
+            atexit.register(_executor.shutdown, wait=False)
+        return _executor
+
+
+def _submit(fn, *args):
+    if not _pending.acquire(blocking=False):
+        raise PasswordPoolBusy("too many password checks in progress")
+    try:
+        future = _get_executor().submit(fn, *args)
+    except BaseException:
+        _pending.release()
+        raise
+    future.add_done_callback(lambda _: _pending.release())
+    return future
+
+
+def hash_password(password):
+    return _submit(generate_password_hash, password, HASH_METHOD).result()
+
+
+def verify_password(pwhash, password):
+    return _submit(check_password_hash, pwhash, password).result()
+
+
+async def hash_password_async(password):
+    return await asyncio.wrap_future(_submit(generate_password_hash, password, HASH_METHOD))
+
+
+async def verify_password_async(pwhash, password):
+    return await asyncio.wrap_future(_submit(check_password_hash, pwhash, password))
+
+
+@lru_cache(maxsize=1)
+def _current_method():
+    # werkzeug expands defaults ("scrypt" -> "scrypt:32768:8:1"); let it, once
+    return generate_password_hash("", HASH_METHOD).split("$", 1)[0]
+
+
+def needs_rehash(pwhash):
+    """True if ``pwhash`` wasn't made with HASH_METHOD at its current cost."""
+    return pwhash.split("$", 1)[0] != _current_method()
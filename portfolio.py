@@ -0,0 +1,193 @@
+"""Portfolio analytics over a user's investments and the local price feed.
+
+Holdings with a symbol and quantity are valued at the feed's latest close; the rest at
+their cost basis (``amount``). Returns and covariances come from the feed's daily log
+returns. Holdings without enough history fall back to RISK_ASSUMPTIONS for their risk
+level, treated as uncorrelated with everything else.
+
+``monte_carlo`` projects the portfolio as correlated geometric Brownian motion in monthly
+steps. Simulations run in NumPy batches of BATCH_SIZE paths. Each batch has its own seed
+spawned from one SeedSequence, so results are the same whether the batches run in this
+process or across a process pool (``workers``, default PORTFOLIO_WORKERS).
+"""
+import atexit
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+
+TRADING_DAYS = 252
+MIN_HISTORY = 60  # daily returns needed before a symbol's own history is trusted
+BATCH_SIZE = 1000
+PERCENTILES = (5, 25, 50, 75, 95)
+WORKERS = int(os.getenv("PORTFOLIO_WORKERS", "0"))
+
+# Annual expected return and volatility by risk level, for holdings without price history
+RISK_ASSUMPTIONS = {
+    'low': (0.04, 0.05),
+    'medium': (0.07, 0.15),
+    'high': (0.10, 0.30),
+}
+RISK_ALIASES = {'conservative': 'low', 'moderate': 'medium', 'med': 'medium', 'aggressive': 'high'}
+
+
+def normalize_risk(label):
+    label = (label or '').strip().lower()
+    return RISK_ALIASES.get(label, label) or 'unspecified'
+
+
+def holdings(investments, prices):
+    """One row per investment with its price, market value and return on cost.
+
+    ``investments`` is a ledger frame like ``UserSnapshot['investments']`` (name, symbol,
+    risk_level, quantity, amount_cents).
+    """
+    frame = investments[['name', 'symbol', 'risk_level', 'quantity']].copy()
+    frame['symbol'] = frame['symbol'].fillna('').astype(str)
+    risk = frame['risk_level'].fillna('').astype(str).str.strip().str.lower()
+    frame['risk'] = risk.replace(RISK_ALIASES).replace('', 'unspecified')
+    frame['quantity'] = frame['quantity'].fillna(0.0)
+    frame['cost_basis'] = investments['amount_cents'].to_numpy() / 100
+    frame['price'] = prices.latest(frame['symbol'])
+    priced = frame['price'].notna() & (frame['quantity'] > 0)
+    frame['priced'] = priced
+    frame['market_value'] = np.where(priced, np.round(frame['quantity'] * frame['price'], 2), frame['cost_basis'])
+    frame['gain'] = frame['market_value'] - frame['cost_basis']
+    frame['return_pct'] = np.where(frame['cost_basis'] > 0, frame['gain'] / frame['cost_basis'] * 100, np.nan)
+    return frame
+
+
+def allocation_by_risk(frame):
+    """Market value per normalized risk level, largest first."""
+    return frame.groupby('risk')['market_value'].sum().sort_values(ascending=False)
+
+
+def value_history(frame, prices):
+    """Daily market value of the priced holdings (quantity x close), as a Series by date."""
+    priced = frame[frame['priced']]
+    if priced.empty or not len(prices):
+        return pd.Series(dtype=np.float64, name='Value')
+    closes = prices.closes[:, prices.columns(priced['symbol'])]
+    values = np.nan_to_num(closes) @ priced['quantity'].to_numpy()
+    return pd.Series(values, index=pd.DatetimeIndex(prices.dates), name='Value')
+
+
+def _history_statistics(prices, symbols):
+    # Annualized mean and covariance of daily log returns; NaN where history is too short
+    closes = prices.closes[:, prices.columns(symbols)]
+    returns = pd.DataFrame(np.diff(np.log(closes), axis=0))
+    counts = returns.notna().sum().to_numpy()
+    mean = returns.mean().to_numpy() * TRADING_DAYS
+    cov = returns.cov(min_periods=MIN_HISTORY).to_numpy() * TRADING_DAYS
+    enough = counts >= MIN_HISTORY
+    return mean, cov, enough
+
+
+def projection_inputs(frame, prices):
+    """(asset values, annual mean returns, annual covariance) for monte_carlo.
+
+    Holdings are grouped into assets: one per priced symbol, and one per risk level for
+    everything else (including symbols with too little history).
+    """
+    keys = np.where(frame['priced'], 'symbol:' + frame['symbol'], 'risk:' + frame['risk'])
+    assets = frame.assign(asset=keys).groupby('asset', sort=True)['market_value'].sum()
+    count = len(assets)
+
+    mean = np.zeros(count)
+    cov = np.zeros((count, count))
+    has_history = np.zeros(count, dtype=bool)
+    symbol_rows = np.array([i for i, key in enumerate(assets.index) if key.startswith('symbol:')], dtype=np.intp)
+    if len(symbol_rows):
+        symbols = [assets.index[i].split(':', 1)[1] for i in symbol_rows]
+        hist_mean, hist_cov, enough = _history_statistics(prices, symbols)
+        rows = symbol_rows[enough]
+        mean[rows] = hist_mean[enough]
+        cov[np.ix_(rows, rows)] = hist_cov[np.ix_(enough, enough)]
+        has_history[rows] = True
+
+    risk_of_symbol = frame.groupby('symbol')['risk'].first()
+    for i, key in enumerate(assets.index):
+        if has_history[i]:
+            continue
+        kind, name = key.split(':', 1)
+        risk = risk_of_symbol[name] if kind == 'symbol' else name
+        expected, volatility = RISK_ASSUMPTIONS.get(risk, RISK_ASSUMPTIONS['medium'])
+        mean[i] = expected
+        cov[i, i] = volatility ** 2
+    return assets.to_numpy(dtype=np.float64), mean, np.nan_to_num(cov)
+
+
+def _factor(cov):
+    # Like Cholesky, but tolerates the singular covariance of perfectly correlated assets
+    eigenvalues, eigenvectors = np.linalg.eigh(cov)
+    return eigenvectors * np.sqrt(np.clip(eigenvalues, 0.0, None))
+
+
+def _simulate_batch(values, drift, factor, months, paths, seed):
+    rng = np.random.default_rng(seed)
+    shocks = rng.standard_normal((paths, months, len(values))) @ factor.T
+    growth = np.exp(np.cumsum(drift + shocks, axis=1))
+    totals = (growth * values).sum(axis=2)
+    return np.concatenate([np.full((paths, 1), values.sum()), totals], axis=1)
+
+
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def _get_pool(workers):
+    # One long-lived pool, so worker start-up (importing NumPy) is paid once per process
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool = ProcessPoolExecutor(max_workers=workers)
+            _pool_workers = workers
+            atexit.register(_pool.shutdown, wait=False)
+        return _pool
+
+
+@lru_cache(maxsize=64)
+def _monte_carlo(values, mean, cov, months, simulations, seed, workers):
+    values = np.array(values)
+    mean = np.array(mean)
+    cov = np.array(cov).reshape(len(values), len(values))
+    # Monthly log-return drift and shock factor of the annual GBM parameters
+    drift = (mean - 0.5 * np.diag(cov)) / 12
+    factor = _factor(cov / 12)
+
+    batches = [min(BATCH_SIZE, simulations - start) for start in range(0, simulations, BATCH_SIZE)]
+    seeds = np.random.SeedSequence(seed).spawn(len(batches))
+    args = [(values, drift, factor, months, paths, batch_seed) for paths, batch_seed in zip(batches, seeds)]
+    if workers > 1 and len(batches) > 1:
+        paths = list(_get_pool(workers).map(_simulate_batch, *zip(*args)))
+    else:
+        paths = [_simulate_batch(*batch) for batch in args]
+    result = np.percentile(np.concatenate(paths), PERCENTILES, axis=0).T
+    result.flags.writeable = False
+    return result
+
+
+def monte_carlo(values, mean, cov, months=120, simulations=5000, seed=0, workers=None):
+    """Percentiles (PERCENTILES) of total portfolio value, shape (months + 1, 5).
+
+    Deterministic for a given ``seed`` and cached on all arguments.
+    """
+    if not len(values):
+        return np.zeros((months + 1, len(PERCENTILES)))
+    workers = WORKERS if workers is None else workers
+    return _monte_carlo(
+        tuple(np.round(values, 2)),
+        tuple(mean),
+        tuple(np.asarray(cov).ravel()),
+        months,
+        simulations,
+        seed,
+        workers,
+    )
@@ -0,0 +1,138 @@
+"""Closing prices from a local file feed, held as one columnar (dates x symbols) matrix.
+
+PRICE_FEED_DIR (default: data/prices beside this file) holds CSV files with the columns
+``date,symbol,close``, or ``date,close`` in a file named after its symbol (AAPL.csv).
+They are parsed once into a float64 matrix with one row per date and one column per
+symbol, forward-filled over gaps (weekends, holidays). The matrix is saved as a compressed
+.npz beside the feed, so later processes skip CSV parsing until a file changes.
+
+    python price_feed.py            # list symbols, date ranges and latest closes
+    python price_feed.py --rebuild  # re-read the CSVs even if the .npz is current
+"""
+import argparse
+import glob
+import os
+import sys
+import threading
+
+import numpy as np
+
+BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+PRICE_FEED_DIR = os.getenv("PRICE_FEED_DIR", os.path.join(BASE_DIR, "data", "prices"))
+CACHE_FILE = ".prices.npz"
+
+
+class PriceHistory:
+    """Closes as a (dates, symbols) matrix; NaN before a symbol's first price."""
+
+    __slots__ = ('dates', 'symbols', 'closes', '_columns')
+
+    def __init__(self, dates, symbols, closes):
+        self.dates = dates
+        self.symbols = list(symbols)
+        self.closes = closes
+        self._columns = {symbol: i for i, symbol in enumerate(self.symbols)}
+
+    def __contains__(self, symbol):
+        return symbol in self._columns
+
+    def __len__(self):
+        return len(self.dates)
+
+    def columns(self, symbols):
+        """Column index per symbol, -1 for symbols the feed doesn't have."""
+        return np.array([self._columns.get(symbol, -1) for symbol in symbols], dtype=np.intp)
+
+    def latest(self, symbols):
+        """Most recent close per symbol (NaN if unknown)."""
+        columns = self.columns(symbols)
+        if not len(self.dates):
+            return np.full(len(columns), np.nan)
+        return np.where(columns >= 0, self.closes[-1, columns], np.nan)
+
+
+def _signature(feed_dir):
+    files = sorted(glob.glob(os.path.join(feed_dir, "*.csv")))
+    stats = [os.stat(path) for path in files]
+    return files, np.array([f"{os.path.basename(path)}:{st.st_mtime_ns}:{st.st_size}" for path, st in zip(files, stats)])
+
+
+def _read_csvs(files):
+    # Imported here so importing this module (and reading the .npz) doesn't load pandas
+    import pandas as pd
+
+    frames = []
+    for path in files:
+        frame = pd.read_csv(path, parse_dates=['date'])
+        frame.columns = [column.strip().lower() for column in frame.columns]
+        if 'symbol' not in frame:
+            frame['symbol'] = os.path.splitext(os.path.basename(path))[0]
+        frames.append(frame[['date', 'symbol', 'close']])
+    if not frames:
+        return PriceHistory(np.array([], dtype='datetime64[D]'), [], np.empty((0, 0)))
+
+    prices = pd.concat(frames, ignore_index=True).dropna()
+    prices['symbol'] = prices['symbol'].astype(str).str.strip().str.upper()
+    # Last row wins when files overlap on a (date, symbol)
+    wide = prices.pivot_table(index='date', columns='symbol', values='close', aggfunc='last').sort_index().ffill()
+    return PriceHistory(
+        wide.index.values.astype('datetime64[D]'),
+        wide.columns.tolist(),
+        wide.to_numpy(dtype=np.float64),
+    )
+
+
+_cache = {}
+_lock = threading.Lock()
+
+
+def load_prices(feed_dir=None, rebuild=False):
+    """The feed's PriceHistory, reusing the in-process copy or .npz while no CSV has changed."""
+    feed_dir = feed_dir or PRICE_FEED_DIR
+    files, signature = _signature(feed_dir)
+    with _lock:
+        cached = _cache.get(feed_dir)
+        if cached and not rebuild and np.array_equal(cached[0], signature):
+            return cached[1]
+
+        cache_path = os.path.join(feed_dir, CACHE_FILE)
+        history = None
+        if not rebuild and os.path.exists(cache_path):
+            with np.load(cache_path, allow_pickle=False) as stored:
+                if np.array_equal(stored['signature'], signature):
+                    history = PriceHistory(stored['dates'], stored['symbols'].tolist(), stored['closes'])
+        if history is None:
+            history = _read_csvs(files)
+            if files:
+                try:
+                    np.savez_compressed(
+                        cache_path,
+                        signature=signature,
+                        dates=history.dates,
+                        symbols=np.array(history.symbols, dtype=str),
+                        closes=history.closes,
+                    )
+                except OSError:
+                    pass  # read-only feed directory: keep the in-process copy only
+        _cache[feed_dir] = (signature, history)
+        return history
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect the local price feed")
+    parser.add_argument("--dir", default=None, help=f"feed directory (default {PRICE_FEED_DIR})")
+    parser.add_argument("--rebuild", action="store_true", help="re-read the CSV files")
+    args = parser.parse_args(argv)
+
+    history = load_prices(args.dir, rebuild=args.rebuild)
+    if not history.symbols:
+        print(f"No prices found in {args.dir or PRICE_FEED_DIR}", file=sys.stderr)
+        return 1
+    first = np.argmax(~np.isnan(history.closes), axis=0)
+    for i, symbol in enumerate(history.symbols):
+        print(f"{symbol:<10} {history.dates[first[i]]} .. {history.dates[-1]}  {history.closes[-1, i]:>12,.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,29 @@
-from sections.common import BaseSection, DEFAULT_BUDGET, normalize_category, aggregate_expenses, collapse_small_slices, get_budget
-from sections.home import render_home
-from sections.transactions import TransactionSection
-from sections.analysis import AnalysisSection
-from sections.expenses import ExpenseSection
-from sections.debts import DebtSection
-from sections.investments import InvestmentSection
-from sections.budget import BudgetSection
+# Sections are imported on first use (PEP 562 module __getattr__), so pulling in one
+# section, or just sections.common, doesn't import pandas/matplotlib for all the others.
+import importlib
+
+_EXPORTS = {
+    'BaseSection': 'sections.common',
+    'DEFAULT_BUDGET': 'sections.common',
+    'normalize_category': 'sections.common',
+    'aggregate_expenses': 'sections.common',
+    'collapse_small_slices': 'sections.common',
+    'get_budget': 'sections.common',
+    'render_home': 'sections.home',
+    'TransactionSection': 'sections.transactions',
+    'AnalysisSection': 'sections.analysis',
+    'ExpenseSection': 'sections.expenses',
+    'DebtSection': 'sections.debts',
+    'InvestmentSection': 'sections.investments',
+    'BudgetSection': 'sections.budget',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module 'sections' has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name]), name)
+    globals()[name] = value
+    return value
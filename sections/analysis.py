@@ -1,7 +1,10 @@
 import streamlit as st
 import pandas as pd
-from datetime import datetime
-from sections.common import get_budget, aggregate_expenses, BaseSection
+from balance_trend import monthly_balance_series
+from budget_periods import budget_vs_actual
+from database import count_transactions, transaction_page
+from money import to_cents
+from sections.common import get_budget, money_column, BaseSection
 
 
 class AnalysisSection(BaseSection):
@@ -21,26 +24,22 @@ class AnalysisSection(BaseSection):
         with col2:
             st.metric("Account Age", "3 months")
         with col3:
-            total_transactions = len(user.get('transactions', []))
-            st.metric("Transactions", str(total_transactions))
+            st.metric("Transactions", f"{user['transaction_count']:,}")
         with col4:
             st.metric("Avg. Monthly", "$5,250")
 
         st.write("")
         st.write("")
         st.subheader("Budget Overview")
+        st.caption("This month's spending against the monthly budget")
 
-        budget = get_budget(user)
-        expenses = user.get('expenses', [])
-        expense_totals = aggregate_expenses(expenses)
-
-        categories = sorted(set(list(budget.keys()) + list(expense_totals.keys())))
-        actual_by_cat = {cat: expense_totals.get(cat, 0.0) for cat in categories}
+        # The budget is monthly, so compare it with the current month rather than all-time totals
+        comparison = budget_vs_actual(self.user_id, get_budget(user))
 
         budget_actual_data = []
-        for cat in categories:
-            budget_actual_data.append({'Category': f"{cat.capitalize()} Budget", 'Amount': budget.get(cat, 0.0)})
-            budget_actual_data.append({'Category': f"{cat.capitalize()} Actual", 'Amount': actual_by_cat[cat]})
+        for cat, (budgeted, actual) in comparison.items():
+            budget_actual_data.append({'Category': f"{cat.capitalize()} Budget", 'Amount': budgeted})
+            budget_actual_data.append({'Category': f"{cat.capitalize()} Actual", 'Amount': actual})
 
         if budget_actual_data:
             budget_actual_df = pd.DataFrame(budget_actual_data)
@@ -51,22 +50,15 @@ class AnalysisSection(BaseSection):
         st.write("")
         st.write("")
 
-        actual_by_cat = {cat: expense_totals.get(cat, 0.0) for cat in categories}
+        actual_by_cat = dict(sorted(user['expense_totals'].items()))
 
         col_chart1, col_chart2 = st.columns(2)
 
         with col_chart1:
             st.subheader("Balance Trend")
 
-            dates = pd.date_range(end=datetime.now(), periods=6, freq='ME')
-            balances = [10000, 11500, 13200, 14800, 15200, user['balance']]
-
-            chart_data = pd.DataFrame({
-                'Month': dates.strftime('%b %Y'),
-                'Balance': balances
-            })
-
-            st.line_chart(chart_data.set_index('Month'))
+            trend = monthly_balance_series(self.user_id, user['balance'], months=12)
+            st.line_chart(trend)
 
         with col_chart2:
             st.subheader("Spending Categories")
@@ -84,23 +76,75 @@ class AnalysisSection(BaseSection):
         st.write("")
         st.write("")
 
-        st.subheader("Recent Transactions")
-        if 'transactions' in user and user['transactions']:
-            transactions_list = user['transactions'][:10]
-            transactions_data = []
-            running_balance = user['balance']
-
-            for trans in transactions_list:
-                amount_str = f"+${abs(trans['amount']):,.2f}" if trans['amount'] > 0 else f"-${abs(trans['amount']):,.2f}"
-                transactions_data.append({
-                    'Date': trans['date'],
-                    'Description': trans['description'],
-                    'Amount': amount_str,
-                    'Balance': f"${running_balance:,.2f}"
-                })
-                running_balance -= trans['amount']
-
-            transactions = pd.DataFrame(transactions_data)
-            st.dataframe(transactions, width="stretch", hide_index=True)
-        else:
+        self.render_transactions(user)
+
+    def render_transactions(self, user):
+        st.subheader("Transactions")
+        if not user['transaction_count']:
             st.info("No transactions yet. Add your first transaction using the 'Add Transaction' page!")
+            return
+
+        col_range, col_type, col_size = st.columns([2, 1, 1])
+        with col_range:
+            date_range = st.date_input("Date range", value=(), key="txn_date_range")
+        with col_type:
+            type_label = st.selectbox("Type", ["All", "Credit", "Debit"], key="txn_type")
+        with col_size:
+            page_size = st.selectbox("Rows per page", [10, 25, 50, 100], key="txn_page_size")
+
+        filters = {
+            'date_from': date_range[0] if len(date_range) > 0 else None,
+            'date_to': date_range[1] if len(date_range) > 1 else None,
+            'type': type_label.lower() if type_label != "All" else None,
+        }
+
+        # Each page is (cursor, balance in cents after its newest row); Next pushes, Previous pops.
+        # Running balances only make sense over the unfiltered history.
+        filter_key = (filters['date_from'], filters['date_to'], filters['type'], page_size, self.user_id, user['transaction_count'])
+        if st.session_state.get('txn_filter_key') != filter_key:
+            st.session_state.txn_filter_key = filter_key
+            st.session_state.txn_pages = [(None, to_cents(user['balance']))]
+        pages = st.session_state.txn_pages
+        cursor, running_balance = pages[-1]
+        show_balance = not any(filters.values())
+
+        page, next_cursor = transaction_page(self.user_id, before=cursor, limit=page_size, **filters)
+        if page.empty:
+            st.info("No transactions match these filters.")
+            return
+
+        # Balance after each row (newest first): subtract the amounts of the newer rows
+        amounts = page['amount_cents'].to_numpy()
+        balances = running_balance - (amounts.cumsum() - amounts)
+        running_balance -= int(amounts.sum())
+
+        transactions = pd.DataFrame({
+            'Date': page['date'],
+            'Description': page['description'],
+            'Amount': amounts / 100,
+        })
+        if show_balance:
+            transactions['Balance'] = balances / 100
+        st.dataframe(
+            transactions,
+            width="stretch",
+            hide_index=True,
+            column_config={
+                'Date': st.column_config.DateColumn(format="YYYY-MM-DD"),
+                'Amount': money_column(),
+                'Balance': money_column(),
+            },
+        )
+
+        col_prev, col_page, col_next = st.columns([1, 2, 1])
+        with col_prev:
+            if st.button("← Newer", disabled=len(pages) == 1, width="stretch"):
+                pages.pop()
+                st.rerun()
+        with col_page:
+            total = user['transaction_count'] if show_balance else count_transactions(self.user_id, **filters)
+            st.caption(f"Page {len(pages)} of {max(1, -(-total // page_size))} · {total:,} transactions")
+        with col_next:
+            if st.button("Older →", disabled=next_cursor is None, width="stretch"):
+                pages.append((next_cursor, running_balance))
+                st.rerun()
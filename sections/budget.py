@@ -1,8 +1,11 @@
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
-from database import update_user_budget, load_users
-from sections.common import get_budget, aggregate_expenses, collapse_small_slices, BaseSection
+from datetime import date
+from budget_periods import WINDOWS, budget_vs_actual, month_of, months_ending
+from database import update_user_budget_for_user
+from money import total
+from sections.common import get_budget, collapse_small_slices, BaseSection
+from sections.charts import DONUT_RENDERERS, DEFAULT_DONUT_RENDERER, render_donut_chart
 
 
 class BudgetSection(BaseSection):
@@ -29,15 +32,13 @@ class BudgetSection(BaseSection):
                 submitted = st.form_submit_button("Update Budget", type="primary")
 
                 if submitted:
-                    st.session_state.users_db[self.user_email]['budget'] = budget_inputs
-                    update_user_budget(self.user_email, budget_inputs)
-                    st.session_state.users_db = load_users()
+                    update_user_budget_for_user(self.user_id, budget_inputs)
                     st.success("Budget updated successfully!")
                     st.rerun()
 
         with col2:
             st.subheader("Current Budget Summary")
-            total_budget = sum(budget.values())
+            total_budget = total(list(budget.values()))
             st.metric("Total Monthly Budget", f"${total_budget:,.2f}")
             categories = list(budget.keys())
             for cat in categories[:5]:
@@ -46,53 +47,59 @@ class BudgetSection(BaseSection):
         st.write("")
         st.subheader("Budget vs Actual")
 
-        expenses = user.get('expenses', [])
-        expense_totals = aggregate_expenses(expenses)
-        categories = sorted(set(list(budget.keys()) + list(expense_totals.keys())))
-        actual_by_cat = {cat: expense_totals.get(cat, 0.0) for cat in categories}
+        period_col, window_col = st.columns(2)
+        with period_col:
+            period = st.selectbox(
+                "Month",
+                months_ending(month_of(), 24)[::-1],
+                format_func=lambda p: date(p[0], p[1], 1).strftime("%B %Y"),
+                key="budget_period",
+            )
+        with window_col:
+            window = st.radio(
+                "Period",
+                WINDOWS,
+                format_func=lambda n: "Month" if n == 1 else f"{n} months",
+                horizontal=True,
+                key="budget_window",
+            )
+
+        # Budgets are monthly, so a window of N months compares N x budget with N months of spending
+        comparison = budget_vs_actual(self.user_id, budget, period, window)
+        categories = list(comparison)
+        actual_by_cat = {cat: actual for cat, (_, actual) in comparison.items()}
 
         if any(v > 0 for v in actual_by_cat.values()):
             expense_df = pd.DataFrame({
-                'Category': [cat.capitalize() for cat in actual_by_cat.keys()],
-                'Amount': list(actual_by_cat.values())
+                'Category': [cat.capitalize() for cat in categories],
+                'Budget': [budgeted for budgeted, _ in comparison.values()],
+                'Actual': list(actual_by_cat.values())
             })
-            st.bar_chart(expense_df.set_index('Category'))
+            st.bar_chart(expense_df.set_index('Category'), stack=False)
         else:
-            st.info("No expenses recorded yet. Add some expenses to see the chart.")
+            st.info("No expenses recorded in this period. Add some expenses to see the chart.")
 
         st.write("")
         st.write("")
 
         st.subheader("Expense Breakdown (Donut Chart)")
-        collapsed = collapse_small_slices(expense_totals)
-        chart_items = [(cat, total) for cat, total in collapsed.items() if total > 0]
+        collapsed = collapse_small_slices({cat: actual for cat, actual in actual_by_cat.items() if actual > 0})
+        chart_items = [(cat, amount) for cat, amount in collapsed.items() if amount > 0]
         labels = [cat.capitalize() for cat, _ in chart_items]
-        values = [total for _, total in chart_items]
+        values = [amount for _, amount in chart_items]
 
         if values:
-            total = sum(values)
-
-            def format_pct(pct):
-                if pct < 0.01 and total > 0:
-                    return "<0.01%"
-                return f"{pct:.2f}%"
-
-            fig, ax = plt.subplots(figsize=(6, 6))
-            colors = plt.cm.Paired.colors[:len(values)] if values else []
-            ax.pie(
-                values,
-                labels=labels,
-                autopct=format_pct,
-                startangle=90,
-                wedgeprops={'width': 0.35, 'edgecolor': 'white', 'linewidth': 1},
-                colors=colors,
-                pctdistance=0.75,
-                labeldistance=1.1
+            renderer = st.radio(
+                "Chart renderer",
+                list(DONUT_RENDERERS),
+                index=list(DONUT_RENDERERS).index(DEFAULT_DONUT_RENDERER) if DEFAULT_DONUT_RENDERER in DONUT_RENDERERS else 0,
+                format_func=DONUT_RENDERERS.get,
+                horizontal=True,
+                key="donut_renderer",
             )
-            ax.set(aspect='equal')
-            st.pyplot(fig)
+            render_donut_chart(zip(labels, values), renderer)
         else:
-            st.info("No expenses recorded yet.")
+            st.info("No expenses recorded in this period.")
 
         st.write("")
         st.write("")
@@ -101,6 +108,5 @@ class BudgetSection(BaseSection):
         cols = st.columns(2)
         for i, cat in enumerate(categories):
             with cols[i % 2]:
-                budgeted = budget.get(cat, 0.0)
-                actual = actual_by_cat.get(cat, 0.0)
+                budgeted, actual = comparison[cat]
                 st.metric(f"{cat.capitalize()} Budget", f"${budgeted:,.2f}", delta=f"{actual - budgeted:,.2f}")
@@ -0,0 +1,74 @@
+import io
+import os
+from functools import lru_cache
+
+import streamlit as st
+
+# How the donut chart is drawn: "svg" or "png" (matplotlib, cached) or "vega-lite" (native)
+DONUT_RENDERERS = {"svg": "SVG", "png": "PNG", "vega-lite": "Vega-Lite"}
+DEFAULT_DONUT_RENDERER = os.getenv("DONUT_CHART_RENDERER", "svg").lower()
+
+
+def _format_pct(pct):
+    if pct < 0.01:
+        return "<0.01%"
+    return f"{pct:.2f}%"
+
+
+@lru_cache(maxsize=128)
+def donut_chart_image(items, fmt="svg"):
+    """Render ``items`` ((label, value) pairs, as a tuple) as a donut; returns image bytes.
+
+    Cached on the items themselves, so reruns with unchanged totals reuse the bytes.
+    Drawn on a standalone Figure rather than through pyplot, so no figure outlives the call.
+    """
+    # Imported here so pages that hit the cache (or use Vega-Lite) never load matplotlib
+    import matplotlib
+    from matplotlib.figure import Figure
+
+    labels = [label for label, _ in items]
+    values = [value for _, value in items]
+    fig = Figure(figsize=(6, 6))
+    ax = fig.subplots()
+    ax.pie(
+        values,
+        labels=labels,
+        autopct=_format_pct,
+        startangle=90,
+        wedgeprops={'width': 0.35, 'edgecolor': 'white', 'linewidth': 1},
+        colors=matplotlib.colormaps["Paired"].colors[:len(values)],
+        pctdistance=0.75,
+        labeldistance=1.1
+    )
+    ax.set(aspect='equal')
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format=fmt, bbox_inches="tight", transparent=True, dpi=100)
+    fig.clear()
+    return buffer.getvalue()
+
+
+def donut_chart_spec(items):
+    return {
+        "data": {"values": [{"Category": label, "Amount": value} for label, value in items]},
+        "mark": {"type": "arc", "innerRadius": 70, "stroke": "white"},
+        "encoding": {
+            "theta": {"field": "Amount", "type": "quantitative", "stack": True},
+            "color": {"field": "Category", "type": "nominal", "sort": None},
+            "order": {"field": "Amount", "type": "quantitative", "sort": "descending"},
+            "tooltip": [
+                {"field": "Category", "type": "nominal"},
+                {"field": "Amount", "type": "quantitative", "format": "$,.2f"},
+            ],
+        },
+        "view": {"stroke": None},
+    }
+
+
+def render_donut_chart(items, renderer=DEFAULT_DONUT_RENDERER):
+    items = tuple((label, float(value)) for label, value in items)
+    if renderer == "vega-lite":
+        st.vega_lite_chart(spec=donut_chart_spec(items), height=400)
+    elif renderer == "png":
+        st.image(donut_chart_image(items, "png"))
+    else:
+        st.image(donut_chart_image(items, "svg").decode("utf-8"))
@@ -1,6 +1,7 @@
 import os
 import streamlit as st
-from database import load_users
+from database import get_user
+from money import cents_array, from_cents, to_cents
 
 # Default categories/budget to keep UI predictable
 DEFAULT_BUDGET = {
@@ -21,19 +22,29 @@ def normalize_category(category: str) -> str:
     return category.strip().lower() if isinstance(category, str) else ''
 
 
+def normalized(column):
+    """normalize_category over a frame's text column; missing values become ''."""
+    return column.fillna('').str.strip().str.lower()
+
+
 def format_currency(value: float, decimals: int = 2) -> str:
     """Format a numeric value as currency with a dollar prefix."""
     return f"${float(value):,.{decimals}f}"
 
 
+def money_column(label=None):
+    # Formatted by the browser, so tables don't format every cell in Python
+    return st.column_config.NumberColumn(label, format="dollar")
+
+
 def aggregate_expenses(expenses):
-    totals_by_category = {}
+    cents_by_category = {}
     for expense in expenses:
         category = normalize_category(expense.get('category', ''))
         if not category:
             continue
-        totals_by_category[category] = totals_by_category.get(category, 0.0) + float(expense.get('cost', 0.0))
-    return totals_by_category
+        cents_by_category[category] = cents_by_category.get(category, 0) + to_cents(expense.get('cost') or 0)
+    return {category: from_cents(cents) for category, cents in cents_by_category.items()}
 
 
 def collapse_small_slices(totals_by_category, threshold_ratio=0.03):
@@ -41,17 +52,16 @@ def collapse_small_slices(totals_by_category, threshold_ratio=0.03):
     if total_amount == 0:
         return totals_by_category
     main_categories = {name: amount for name, amount in totals_by_category.items() if amount / total_amount >= threshold_ratio}
-    other_total = sum(amount for name, amount in totals_by_category.items() if name not in main_categories)
-    if other_total > 0:
-        main_categories["other"] = main_categories.get("other", 0) + other_total
+    other_cents = int(cents_array([amount for name, amount in totals_by_category.items() if name not in main_categories]).sum())
+    if other_cents > 0:
+        main_categories["other"] = from_cents(to_cents(main_categories.get("other", 0)) + other_cents)
     return main_categories
 
 
 def get_budget(user):
-    # Always return a full set of categories to avoid KeyErrors/empty charts
-    budget = user.get('budget') or {}
-    merged = {**DEFAULT_BUDGET, **budget}
-    return {k: float(v) for k, v in merged.items()}
+    # Always return a full set of categories to avoid KeyErrors/empty charts. Stored amounts
+    # come from the budgets table as floats already, keyed by normalized category.
+    return {**DEFAULT_BUDGET, **(user.get('budget') or {})}
 
 
 class BaseSection:
@@ -59,10 +69,9 @@ class BaseSection:
 
     def __init__(self, user_email: str):
         self.user_email = user_email
+        self.user_id = st.session_state.user_id
 
     @property
     def user(self):
-        return st.session_state.users_db[self.user_email]
-
-    def refresh_users(self):
-        st.session_state.users_db = load_users()
+        # Served from the process-wide cache; database writes keep it current
+        return get_user(self.user_id)
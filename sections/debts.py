@@ -1,12 +1,15 @@
 import streamlit as st
+import numpy as np
 import pandas as pd
-from database import add_debt, update_debt, delete_debt, load_users
-from sections.common import BaseSection, format_currency
+from database import add_debt_for_user, update_debt_for_user, delete_debt_for_user
+from debt_payoff import STRATEGIES, compare_strategies, simulate
+from ledger import column_total
+from sections.common import BaseSection, format_currency, money_column
 
 
 class DebtSection(BaseSection):
     def render(self):
-        user = self.user
+        debts = self.user['debts']
         st.title("Debts")
         st.write("Track your debts and loans")
         st.write("")
@@ -37,47 +40,50 @@ class DebtSection(BaseSection):
                             'monthly_pay': debt_monthly
                         }
 
-                        if add_debt(self.user_email, debt_data, st.session_state.users_db):
+                        row = add_debt_for_user(self.user_id, debt_data)
+                        if row:
                             st.success("Debt added successfully!")
                             st.balloons()
-                            st.session_state.users_db = load_users()
                             st.rerun()
                         else:
                             st.error("Failed to add debt")
 
         with col2:
             st.subheader("Debt Summary")
-            debts = user.get('debts', [])
-            total_debts = sum(debt['amount_owed'] for debt in debts)
+            total_debts = column_total(debts, 'amount_owed_cents')
             st.metric("Total Debt", f"${total_debts:,.2f}")
 
         st.write("")
         st.subheader("Your Debts")
 
-        debts = user.get('debts', [])
-        if debts:
-            display_rows = [
-                {
-                    "Name": debt["name"],
-                    "Amount Owed": format_currency(debt["amount_owed"]),
-                    "Interest Rate (%)": f"{float(debt['interest_rate']):.2f}%",
-                    "Monthly Pay": format_currency(debt["monthly_pay"]),
-                }
-                for debt in debts
-            ]
-            debts_df = pd.DataFrame(display_rows)
-            st.dataframe(debts_df, width="stretch", hide_index=True)
+        if not debts.empty:
+            debts_df = pd.DataFrame({
+                "Name": debts["name"],
+                "Amount Owed": debts["amount_owed_cents"] / 100,
+                "Interest Rate (%)": debts["interest_rate"],
+                "Monthly Pay": debts["monthly_pay_cents"] / 100,
+            })
+            st.dataframe(
+                debts_df,
+                width="stretch",
+                hide_index=True,
+                column_config={
+                    "Amount Owed": money_column(),
+                    "Interest Rate (%)": st.column_config.NumberColumn(format="%.2f%%"),
+                    "Monthly Pay": money_column(),
+                },
+            )
 
             with st.form("edit_debt_form"):
                 st.markdown("**Edit or Delete Debt**")
-                options = {f"{d['name']} - ${d['amount_owed']:.2f}": d for d in debts}
+                options = {f"{d.name} - ${d.amount_owed_cents / 100:.2f}": d for d in debts.itertuples(index=False)}
                 selected_label = st.selectbox("Select debt", list(options.keys()))
                 selected = options[selected_label]
 
-                new_name = st.text_input("Name", value=selected["name"])
-                new_amount = st.number_input("Amount Owed ($)", min_value=0.01, value=float(selected["amount_owed"]), step=0.01, format="%.2f")
-                new_rate = st.number_input("Interest Rate (%)", min_value=0.0, value=float(selected["interest_rate"]), step=0.01, format="%.2f")
-                new_monthly = st.number_input("Monthly Payment ($)", min_value=0.01, value=float(selected["monthly_pay"]), step=0.01, format="%.2f")
+                new_name = st.text_input("Name", value=selected.name)
+                new_amount = st.number_input("Amount Owed ($)", min_value=0.01, value=selected.amount_owed_cents / 100, step=0.01, format="%.2f")
+                new_rate = st.number_input("Interest Rate (%)", min_value=0.0, value=float(selected.interest_rate) if pd.notna(selected.interest_rate) else 0.0, step=0.01, format="%.2f")
+                new_monthly = st.number_input("Monthly Payment ($)", min_value=0.01, value=selected.monthly_pay_cents / 100, step=0.01, format="%.2f")
 
                 col_a, col_b = st.columns(2)
                 with col_a:
@@ -92,20 +98,77 @@ class DebtSection(BaseSection):
                         "interest_rate": new_rate,
                         "monthly_pay": new_monthly
                     }
-                    ok, msg = update_debt(self.user_email, selected["id"], updated)
-                    if ok:
+                    row, msg = update_debt_for_user(self.user_id, int(selected.id), updated)
+                    if row:
                         st.success("Debt updated")
-                        st.session_state.users_db = load_users()
                         st.rerun()
                     else:
                         st.error(msg or "Update failed")
                 elif delete_btn:
-                    ok, msg = delete_debt(self.user_email, selected["id"])
-                    if ok:
+                    row, msg = delete_debt_for_user(self.user_id, int(selected.id))
+                    if row:
                         st.success("Debt deleted")
-                        st.session_state.users_db = load_users()
                         st.rerun()
                     else:
                         st.error(msg or "Delete failed")
+
+            st.write("")
+            self.render_payoff_plan(debts)
         else:
             st.info("No debts added yet. Add your first debt above!")
+
+    def render_payoff_plan(self, debts):
+        st.subheader("Payoff Plan")
+        this_month = pd.Timestamp.today().to_period('M')
+
+        def payoff_date(months):
+            return "Never" if months < 0 else (this_month + int(months)).strftime('%b %Y')
+
+        col1, col2 = st.columns([1, 2])
+        with col1:
+            extra = st.number_input("Extra monthly payment ($)", min_value=0.0, step=25.0, format="%.2f", key="debt_extra")
+            strategy = st.radio("Strategy", STRATEGIES, format_func=str.capitalize, horizontal=True, key="debt_strategy")
+
+        results = compare_strategies(debts, extra)
+        chosen = results[strategy]
+        months = int(chosen['months'][0])
+        baseline = results['minimum']
+        with col2:
+            m1, m2, m3 = st.columns(3)
+            m1.metric("Debt-free", payoff_date(months), f"{months} months" if months >= 0 else None, delta_color="off")
+            m2.metric("Total Interest", format_currency(chosen['total_interest'][0]))
+            if months >= 0 and baseline['months'][0] >= 0:
+                m3.metric("Saved vs Minimums", format_currency(baseline['total_interest'][0] - chosen['total_interest'][0]))
+            else:
+                m3.metric("Saved vs Minimums", "n/a")
+            if months < 0:
+                st.warning("Payments don't cover the interest on every debt; raise the payment to pay them off.")
+
+        st.dataframe(
+            pd.DataFrame({
+                "Name": debts["name"],
+                "Payoff Date": [payoff_date(m) for m in chosen['payoff_month'][0]],
+                "Interest Paid": [format_currency(i) for i in chosen['interest'][0]],
+            }),
+            width="stretch",
+            hide_index=True,
+        )
+
+        # Remaining balance month by month under each strategy, padded to the longer plan
+        horizon = max(results[name]['balance'].shape[1] for name in STRATEGIES)
+        balances = pd.DataFrame(index=pd.period_range(this_month, periods=horizon, freq='M').to_timestamp())
+        for name in STRATEGIES:
+            balance = results[name]['balance'][0]
+            balances[name.capitalize()] = np.pad(balance, (0, horizon - len(balance)))
+        st.write("**Balance Over Time**")
+        st.line_chart(balances)
+
+        # What-if: every extra payment from $0 up in one vectorized run per strategy
+        step = 25.0
+        extras = np.arange(0.0, max(1000.0, extra * 3) + step, step)
+        what_if = pd.DataFrame(index=pd.Index(extras, name="Extra payment ($)"))
+        for name in STRATEGIES:
+            months_needed = simulate(debts, name, extras)['months']
+            what_if[name.capitalize()] = np.where(months_needed < 0, np.nan, months_needed)
+        st.write("**Months to Debt-Free by Extra Payment**")
+        st.line_chart(what_if)
@@ -1,12 +1,14 @@
 import streamlit as st
 import pandas as pd
-from database import add_expense, update_expense, delete_expense, load_users
-from sections.common import BaseSection, format_currency
+from datetime import date
+from database import add_expense_for_user, update_expense_for_user, delete_expense_for_user
+from ledger import column_total
+from sections.common import BaseSection, money_column, normalized
 
 
 class ExpenseSection(BaseSection):
     def render(self):
-        user = self.user
+        expenses = self.user['expenses']
         st.title("Expenses")
         st.write("Track your expenses by category and cost")
         st.write("")
@@ -20,71 +22,73 @@ class ExpenseSection(BaseSection):
                 expense_name = st.text_input("Expense Name *")
                 expense_category = st.selectbox("Category *", ["groceries", "rent", "utilities", "transportation", "entertainment", "healthcare", "dining out", "shopping", "subscriptions", "other"])
                 expense_cost = st.number_input("Cost ($) *", min_value=0.01, step=0.01, format="%.2f")
+                expense_date = st.date_input("Date *", value=date.today())
 
                 submitted = st.form_submit_button("Add Expense", type="primary")
 
                 if submitted:
                     name_norm = expense_name.strip()
                     category_norm = expense_category.strip().lower()
-                    existing = [
-                        exp for exp in user.get('expenses', [])
-                        if exp.get('name', '').strip().lower() == name_norm.lower()
-                        and exp.get('category', '').strip().lower() == category_norm
-                    ]
+                    existing = (
+                        (normalized(expenses['name']) == name_norm.lower())
+                        & (normalized(expenses['category']) == category_norm)
+                        & (expenses['date'] == pd.Timestamp(expense_date))
+                    ).any()
 
                     if not name_norm:
                         st.error("Please enter an expense name")
                     elif expense_cost <= 0:
                         st.error("Please enter a valid cost")
                     elif existing:
-                        st.error("That expense already exists in this category")
+                        st.error("That expense already exists in this category on that date")
                     else:
                         expense_data = {
                             'name': name_norm,
                             'category': expense_category,
-                            'cost': expense_cost
+                            'cost': expense_cost,
+                            'date': expense_date
                         }
 
-                        success, message = add_expense(self.user_email, expense_data, st.session_state.users_db)
-                        if success:
+                        row, message = add_expense_for_user(self.user_id, expense_data)
+                        if row:
                             st.success("Expense added successfully!")
                             st.balloons()
-                            st.session_state.users_db = load_users()
                             st.rerun()
                         else:
                             st.error(message or "Failed to add expense")
 
         with col2:
             st.subheader("Expense Summary")
-            expenses = user.get('expenses', [])
-            total_expenses = sum(exp['cost'] for exp in expenses)
+            total_expenses = column_total(expenses, 'cost_cents')
             st.metric("Total Expenses", f"${total_expenses:,.2f}")
 
         st.write("")
         st.subheader("Your Expenses")
 
-        expenses = user.get('expenses', [])
-        if expenses:
-            display_rows = [
-                {
-                    "Name": exp["name"],
-                    "Category": exp["category"],
-                    "Cost": format_currency(exp["cost"]),
-                }
-                for exp in expenses
-            ]
-            expenses_df = pd.DataFrame(display_rows)
-            st.dataframe(expenses_df, width="stretch", hide_index=True)
+        if not expenses.empty:
+            expenses_df = pd.DataFrame({
+                "Date": expenses["date"],
+                "Name": expenses["name"],
+                "Category": expenses["category"],
+                "Cost": expenses["cost_cents"] / 100,
+            })
+            st.dataframe(
+                expenses_df,
+                width="stretch",
+                hide_index=True,
+                column_config={"Date": st.column_config.DateColumn(format="YYYY-MM-DD"), "Cost": money_column()},
+            )
 
             with st.form("edit_expense_form"):
                 st.markdown("**Edit or Delete Expense**")
-                options = {f"{e['name']} ({e['category']}) - ${e['cost']:.2f}": e for e in expenses}
+                options = {f"{e.name} ({e.category}) - ${e.cost_cents / 100:.2f}": e for e in expenses.itertuples(index=False)}
                 selected_label = st.selectbox("Select expense", list(options.keys()))
                 selected = options[selected_label]
 
-                new_name = st.text_input("Name", value=selected["name"])
+                new_name = st.text_input("Name", value=selected.name)
                 new_category = st.selectbox("Category", ["groceries", "rent", "utilities", "transportation", "entertainment", "healthcare", "dining out", "shopping", "subscriptions", "other"], index=0)
-                new_cost = st.number_input("Cost ($)", min_value=0.01, value=float(selected["cost"]), step=0.01, format="%.2f")
+                new_cost = st.number_input("Cost ($)", min_value=0.01, value=selected.cost_cents / 100, step=0.01, format="%.2f")
+                new_date = st.date_input("Date", value=selected.date.date() if pd.notna(selected.date) else date.today())
 
                 col_a, col_b = st.columns(2)
                 with col_a:
@@ -96,20 +100,19 @@ class ExpenseSection(BaseSection):
                     updated = {
                         "name": new_name.strip(),
                         "category": new_category,
-                        "cost": new_cost
+                        "cost": new_cost,
+                        "date": new_date
                     }
-                    ok, msg = update_expense(self.user_email, selected["id"], updated)
-                    if ok:
+                    row, msg = update_expense_for_user(self.user_id, int(selected.id), updated)
+                    if row:
                         st.success("Expense updated")
-                        st.session_state.users_db = load_users()
                         st.rerun()
                     else:
                         st.error(msg or "Update failed")
                 elif delete_btn:
-                    ok, msg = delete_expense(self.user_email, selected["id"])
-                    if ok:
+                    row, msg = delete_expense_for_user(self.user_id, int(selected.id))
+                    if row:
                         st.success("Expense deleted")
-                        st.session_state.users_db = load_users()
                         st.rerun()
                     else:
                         st.error(msg or "Delete failed")
@@ -1,4 +1,5 @@
 import streamlit as st
+from database import get_bank_details
 
 
 def render_home(user):
@@ -15,7 +16,7 @@ def render_home(user):
                     padding: 30px; border-radius: 15px; color: white;'>
             <h3 style='margin: 0; font-weight: 300;'>Available Balance</h3>
             <h1 style='margin: 10px 0; font-size: 48px;'>${user['balance']:,.2f}</h1>
-            <p style='margin: 0; opacity: 0.9;'>Account: ****{user['account_number'][-4:]}</p>
+            <p style='margin: 0; opacity: 0.9;'>Account: ****{user['account_last4']}</p>
         </div>
         """,
             unsafe_allow_html=True,
@@ -45,7 +46,8 @@ def render_home(user):
     with col_b:
         st.markdown("##### Banking Details")
         st.write(f"**Bank Name:** {user['bank_name']}")
-        st.write(f"**Account Number:** ****{user['account_number'][-4:]}")
-        st.write(f"**Routing Number:** {user['routing_number']}")
+        st.write(f"**Account Number:** ****{user['account_last4']}")
+        bank = get_bank_details(user['id'])
+        st.write(f"**Routing Number:** {bank.routing_number if bank else ''}")
         st.write(f"**Account Type:** {user['account_type']}")
         st.write(f"**Current Balance:** ${user['balance']:,.2f}")
@@ -1,12 +1,16 @@
 import streamlit as st
 import pandas as pd
-from database import add_investment, update_investment, delete_investment, load_users
-from sections.common import BaseSection, format_currency
+from database import add_investment_for_user, update_investment_for_user, delete_investment_for_user
+from ledger import column_total
+from money import total
+from portfolio import PERCENTILES, allocation_by_risk, holdings, monte_carlo, projection_inputs, value_history
+from price_feed import load_prices
+from sections.common import BaseSection, format_currency, money_column
 
 
 class InvestmentSection(BaseSection):
     def render(self):
-        user = self.user
+        investments = self.user['investments']
         st.title("Investments")
         st.write("Track your investments and risk levels")
         st.write("")
@@ -18,8 +22,10 @@ class InvestmentSection(BaseSection):
                 st.subheader("Add Investment")
 
                 investment_name = st.text_input("Investment Name *")
-                investment_amount = st.number_input("Amount ($) *", min_value=0.01, step=0.01, format="%.2f")
+                investment_amount = st.number_input("Amount ($) *", min_value=0.01, step=0.01, format="%.2f", help="What you paid (cost basis)")
                 investment_risk = st.text_input("Risk Level *")
+                investment_symbol = st.text_input("Symbol", help="Ticker in the local price feed, to value the holding at market")
+                investment_quantity = st.number_input("Quantity", min_value=0.0, step=1.0, format="%.4f")
 
                 submitted = st.form_submit_button("Add Investment", type="primary")
 
@@ -34,48 +40,67 @@ class InvestmentSection(BaseSection):
                         investment_data = {
                             'name': investment_name,
                             'amount': investment_amount,
-                            'risk_level': investment_risk
+                            'risk_level': investment_risk,
+                            'symbol': investment_symbol,
+                            'quantity': investment_quantity
                         }
 
-                        if add_investment(self.user_email, investment_data, st.session_state.users_db):
+                        row = add_investment_for_user(self.user_id, investment_data)
+                        if row:
                             st.success("Investment added successfully!")
                             st.balloons()
-                            st.session_state.users_db = load_users()
                             st.rerun()
                         else:
                             st.error("Failed to add investment")
 
+        prices = load_prices()
+        frame = holdings(investments, prices)
+
         with col2:
             st.subheader("Investment Summary")
-            investments = user.get('investments', [])
-            total_investments = sum(inv['amount'] for inv in investments)
+            total_investments = column_total(investments, 'amount_cents')
             st.metric("Total Investments", f"${total_investments:,.2f}")
+            market_value = total(frame['market_value'].to_numpy())
+            st.metric("Market Value", f"${market_value:,.2f}", delta=f"{market_value - total_investments:,.2f}")
 
         st.write("")
         st.subheader("Your Investments")
 
-        investments = user.get('investments', [])
-        if investments:
-            display_rows = [
-                {
-                    "Name": inv["name"],
-                    "Amount": format_currency(inv["amount"]),
-                    "Risk Level": inv["risk_level"],
-                }
-                for inv in investments
-            ]
-            investments_df = pd.DataFrame(display_rows)
-            st.dataframe(investments_df, width="stretch", hide_index=True)
+        if not investments.empty:
+            investments_df = pd.DataFrame({
+                "Name": frame["name"],
+                "Symbol": frame["symbol"],
+                "Quantity": frame["quantity"].where(frame["quantity"] != 0),
+                "Cost Basis": frame["cost_basis"],
+                "Price": frame["price"].where(frame["priced"]),
+                "Market Value": frame["market_value"],
+                "Return": frame["return_pct"].where(frame["priced"]),
+                "Risk Level": frame["risk_level"],
+            })
+            st.dataframe(
+                investments_df,
+                width="stretch",
+                hide_index=True,
+                column_config={
+                    "Quantity": st.column_config.NumberColumn(format="%.4g"),
+                    "Cost Basis": money_column(),
+                    "Price": money_column(),
+                    "Market Value": money_column(),
+                    "Return": st.column_config.NumberColumn(format="%+.2f%%"),
+                },
+            )
 
             with st.form("edit_investment_form"):
                 st.markdown("**Edit or Delete Investment**")
-                options = {f"{i['name']} - ${i['amount']:.2f}": i for i in investments}
+                options = {f"{i.name} - ${i.amount_cents / 100:.2f}": i for i in investments.itertuples(index=False)}
                 selected_label = st.selectbox("Select investment", list(options.keys()))
                 selected = options[selected_label]
 
-                new_name = st.text_input("Name", value=selected["name"])
-                new_amount = st.number_input("Amount ($)", min_value=0.01, value=float(selected["amount"]), step=0.01, format="%.2f")
-                new_risk = st.text_input("Risk Level", value=selected["risk_level"])
+                new_name = st.text_input("Name", value=selected.name)
+                new_amount = st.number_input("Amount ($)", min_value=0.01, value=selected.amount_cents / 100, step=0.01, format="%.2f")
+                new_risk = st.text_input("Risk Level", value=selected.risk_level if pd.notna(selected.risk_level) else "")
+                new_symbol = st.text_input("Symbol", value=selected.symbol if pd.notna(selected.symbol) else "")
+                new_quantity = st.number_input("Quantity", min_value=0.0, value=float(selected.quantity) if pd.notna(selected.quantity) else 0.0, step=1.0, format="%.4f")
 
                 col_a, col_b = st.columns(2)
                 with col_a:
@@ -87,22 +112,58 @@ class InvestmentSection(BaseSection):
                     updated = {
                         "name": new_name.strip(),
                         "amount": new_amount,
-                        "risk_level": new_risk.strip()
+                        "risk_level": new_risk.strip(),
+                        "symbol": new_symbol,
+                        "quantity": new_quantity
                     }
-                    ok, msg = update_investment(self.user_email, selected["id"], updated)
-                    if ok:
+                    row, msg = update_investment_for_user(self.user_id, int(selected.id), updated)
+                    if row:
                         st.success("Investment updated")
-                        st.session_state.users_db = load_users()
                         st.rerun()
                     else:
                         st.error(msg or "Update failed")
                 elif delete_btn:
-                    ok, msg = delete_investment(self.user_email, selected["id"])
-                    if ok:
+                    row, msg = delete_investment_for_user(self.user_id, int(selected.id))
+                    if row:
                         st.success("Investment deleted")
-                        st.session_state.users_db = load_users()
                         st.rerun()
                     else:
                         st.error(msg or "Delete failed")
+
+            st.write("")
+            self.render_analytics(frame, prices)
         else:
             st.info("No investments added yet. Add your first investment above!")
+
+    def render_analytics(self, frame, prices):
+        st.subheader("Portfolio Analytics")
+        col1, col2 = st.columns(2)
+        with col1:
+            st.write("**Allocation by Risk Level**")
+            allocation = allocation_by_risk(frame)
+            st.bar_chart(allocation.rename(index=str.capitalize).rename("Market Value"))
+        with col2:
+            st.write("**Value of Priced Holdings**")
+            history = value_history(frame, prices)
+            if history.empty:
+                st.info("Add a symbol from the price feed and a quantity to a holding to chart its value.")
+            else:
+                st.line_chart(history.iloc[-3 * 252:])
+
+        st.write("**Projection (Monte Carlo)**")
+        years = st.slider("Years ahead", min_value=1, max_value=30, value=10, key="portfolio_years")
+        values, mean, cov = projection_inputs(frame, prices)
+        bands = monte_carlo(values, mean, cov, months=years * 12)
+        this_month = pd.Timestamp.today().to_period('M')
+        projection = pd.DataFrame(
+            bands,
+            index=pd.period_range(this_month, periods=len(bands), freq='M').to_timestamp(),
+            columns=[f"{p}th percentile" for p in PERCENTILES],
+        )
+        st.line_chart(projection)
+        low, median, high = bands[-1, 0], bands[-1, PERCENTILES.index(50)], bands[-1, -1]
+        m1, m2, m3 = st.columns(3)
+        m1.metric(f"Median in {years}y", format_currency(median, 0))
+        m2.metric("Pessimistic (5th)", format_currency(low, 0))
+        m3.metric("Optimistic (95th)", format_currency(high, 0))
+        st.caption("Based on price-feed history where available, otherwise typical returns for the risk level. Not a forecast.")
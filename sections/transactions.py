@@ -1,16 +1,21 @@
 import streamlit as st
 from datetime import date
-from database import add_transaction, load_users
+from database import add_transaction_for_user
 from sections.common import BaseSection
 
 
 class TransactionSection(BaseSection):
     def render(self):
-        user = self.user
         st.title("Add Transaction")
         st.write("Record a new transaction for your account")
         st.write("")
 
+        added_balance = st.session_state.pop('added_balance', None)
+        if added_balance is not None:
+            st.success("Transaction added successfully!")
+            st.balloons()
+            st.info(f"New balance: ${added_balance:,.2f}")
+
         col1, col2 = st.columns([2, 1])
 
         with col1:
@@ -67,17 +72,40 @@ class TransactionSection(BaseSection):
                             'notes': notes if notes else ''
                         }
 
-                        if add_transaction(self.user_email, transaction_data, st.session_state.users_db):
-                            st.success("Transaction added successfully!")
-                            st.balloons()
-                            st.session_state.users_db = load_users()
-                            st.info(f"New balance: ${st.session_state.users_db[self.user_email]['balance']:,.2f}")
+                        row, balance = add_transaction_for_user(self.user_id, transaction_data)
+                        if row:
+                            # Shown after the rerun, which would clear anything drawn now
+                            st.session_state.added_balance = balance
                             st.rerun()
                         else:
                             st.error("Failed to add transaction")
 
+            st.write("")
+            with st.expander("Import from bank export (CSV or OFX)"):
+                uploaded = st.file_uploader("Statement file", type=["csv", "ofx", "qfx"])
+                if uploaded is not None and st.button("Import Transactions", type="primary"):
+                    # Deferred: the importer pulls in pandas via balance_trend
+                    from importer import import_file, TransactionImportError
+                    try:
+                        with st.spinner("Importing..."):
+                            result = import_file(self.user_id, uploaded, uploaded.name)
+                    except TransactionImportError as e:
+                        st.error(str(e))
+                    except Exception:
+                        st.error("Import failed; no transactions were added")
+                    else:
+                        st.success(f"Imported {result['imported']:,} transactions. New balance: ${result['balance']:,.2f}")
+                        if result['error_count']:
+                            st.warning(f"Skipped {result['error_count']:,} invalid rows")
+                            st.dataframe(
+                                [{'Line': line, 'Problem': message} for line, message in result['errors']],
+                                hide_index=True,
+                            )
+
         with col2:
             st.subheader("Current Balance")
-            st.metric("Balance", f"${user['balance']:,.2f}")
+            # Read here rather than at the top, so it includes an import made on this run
+            # (no rerun there, which would clear the import's result and skipped rows)
+            st.metric("Balance", f"${self.user['balance']:,.2f}")
             st.write("")
             st.info("Tips:\n\n- Credit: Money coming in (salary, refunds)\n\n- Debit: Money going out (bills, purchases)")
@@ -1,5 +1,5 @@
 import streamlit as st
-from database import validate_email, signup_user, load_users
+from database import validate_email, signup_user, user_exists
 
 def show_signup_page():
     st.title("Create New Account")
@@ -77,7 +77,7 @@ def show_signup_page():
                 errors.append("Email is required")
             elif not validate_email(email):
                 errors.append("Invalid email format")
-            elif email in st.session_state.users_db:
+            elif user_exists(email):
                 errors.append("Email already registered")
             if not phone.strip():
                 errors.append("Phone number is required")
@@ -134,8 +134,7 @@ def show_signup_page():
                     }  # Default monthly budget
                 }
                 
-                if signup_user(user_data, st.session_state.users_db):
-                    st.session_state.users_db = load_users()
+                if signup_user(user_data):
                     st.session_state.signup_success = True
                     st.rerun()
                 else:
@@ -0,0 +1,91 @@
+import ledger
+from money import from_cents, to_cents
+
+
+class UserSnapshot(dict):
+    """One user's data as loaded by ``database.load_user`` and shared via ``database.user_cache``.
+
+    Keeps the same scalar keys as the per-user dicts ``load_users()`` returns, so
+    sections can keep using ``user['balance']``. ``expenses``, ``debts`` and
+    ``investments`` are DataFrames (see ``ledger``) rather than lists of dicts, and only
+    ``transaction_count`` is kept of the transactions: history is paged from the database.
+
+    The ``database`` mutators apply each persisted row to the cached snapshot with one
+    of the ``apply_*`` methods rather than reloading it.
+
+    Sensitive columns are not kept: there is no password hash, and the account number
+    is reduced to ``account_last4`` (see ``database.get_bank_details`` for the rest).
+    """
+
+    __slots__ = ()
+
+    @property
+    def id(self):
+        return self['id']
+
+    @property
+    def email(self):
+        return self['email']
+
+    # Patches are applied by id and only once: a snapshot loaded between a write's commit
+    # and its patch already includes the write.
+
+    def apply_added(self, collection, row):
+        self.apply_updated(collection, row)
+
+    def apply_updated(self, collection, row):
+        frame = self[collection]
+        if collection == 'expenses':
+            self._remove_expense_totals(frame[frame['id'] == row['id']])
+            self._adjust_expense_total(row.get('category'), to_cents(row.get('cost') or 0))
+        self[collection] = ledger.upsert(frame, collection, row)
+
+    def apply_deleted(self, collection, row):
+        frame = self[collection]
+        removed = frame[frame['id'] == row['id']]
+        if removed.empty:
+            return
+        if collection == 'expenses':
+            self._remove_expense_totals(removed)
+        self[collection] = ledger.without(frame, row['id'])
+
+    def _remove_expense_totals(self, expenses):
+        for category, cents in zip(expenses['category'], expenses['cost_cents']):
+            self._adjust_expense_total(category, -int(cents))
+
+    def _adjust_expense_total(self, category, cents):
+        # Keeps 'expense_totals' (loaded with a GROUP BY) current without re-summing
+        category = category.strip().lower() if isinstance(category, str) else ''
+        if not category:
+            return
+        totals = self['expense_totals']
+        # In cents, so repeated patches don't drift from the database's exact SUM
+        cents = to_cents(totals.get(category, 0.0)) + cents
+        if cents == 0:
+            totals.pop(category, None)
+        else:
+            totals[category] = from_cents(cents)
+
+    def apply_transaction(self, row, balance):
+        # Transactions up to 'transactions_through' were counted in the loaded balance
+        if row['id'] <= self.get('transactions_through', 0):
+            return
+        self['transaction_count'] += 1
+        # Concurrent writers may patch out of commit order; the balance returned with the
+        # highest transaction id is the most recent one.
+        if row['id'] >= self.get('balance_as_of', 0):
+            self['balance'] = balance
+            self['balance_as_of'] = row['id']
+
+    def apply_budget(self, budget):
+        self['budget'] = budget
+
+
+class BankDetails:
+    """A user's full account and routing numbers, fetched on demand and never cached."""
+
+    __slots__ = ('account_number', 'routing_number')
+
+    def __init__(self, account_number, routing_number):
+        self.account_number = account_number
+        self.routing_number = routing_number
@@ -0,0 +1,80 @@
+"""In-memory token buckets that throttle login attempts per email and per client IP.
+
+Each key starts with a full bucket of ``capacity`` attempts, refilled continuously at
+``per_minute`` attempts a minute. Defaults: 5 a minute per email
+(LOGIN_ATTEMPTS_PER_MINUTE) and 30 a minute per IP (LOGIN_IP_ATTEMPTS_PER_MINUTE).
+Buckets are per process and forgotten least-recently-used past ``max_keys``, so a
+flood of distinct keys can't grow memory.
+"""
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+class LoginThrottled(Exception):
+    """Raised when an email or client has no login attempts left for now."""
+
+    def __init__(self, retry_after):
+        self.retry_after = retry_after
+        super().__init__(f"Too many login attempts. Try again in {math.ceil(retry_after)} seconds.")
+
+
+class TokenBucket:
+    __slots__ = ('tokens', 'updated')
+
+    def __init__(self, tokens, updated):
+        self.tokens = tokens
+        self.updated = updated
+
+
+class Throttle:
+    def __init__(self, per_minute, capacity=None, max_keys=100_000):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity or per_minute
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, now=None):
+        """Spend one attempt for ``key``; returns 0.0 if allowed, else seconds until one is."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(self.capacity, now)
+                if len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+                bucket.tokens = min(self.capacity, bucket.tokens + (now - bucket.updated) * self.rate)
+                bucket.updated = now
+            if bucket.tokens >= 1:
+                bucket.tokens -= 1
+                return 0.0
+            return (1 - bucket.tokens) / self.rate
+
+
+class LoginThrottle:
+    def __init__(self, per_email, per_ip):
+        self.emails = Throttle(per_email)
+        self.clients = Throttle(per_ip)
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            per_email=float(os.getenv("LOGIN_ATTEMPTS_PER_MINUTE", "5")),
+            per_ip=float(os.getenv("LOGIN_IP_ATTEMPTS_PER_MINUTE", "30")),
+        )
+
+    def check(self, email, client=None):
+        """Count one attempt; raises LoginThrottled if the email or client is over its limit."""
+        wait = self.emails.take((email or '').strip().lower())
+        if client:
+            wait = max(wait, self.clients.take(client))
+        if wait:
+            raise LoginThrottled(wait)
+
+
+login_throttle = LoginThrottle.from_env()
@@ -0,0 +1,151 @@
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+
+def estimate_size(obj):
+    """Rough deep size in bytes of a snapshot made of dicts, lists, scalars and DataFrames
+    (which count their own contents)."""
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(estimate_size(key) + estimate_size(value) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple)):
+        size += sum(estimate_size(item) for item in obj)
+    return size
+
+
+class UserCache:
+    """Process-wide LRU cache of UserSnapshots keyed by user id.
+
+    Shared by every Streamlit session in the process, so memory is bounded by the
+    limits below rather than by the number of open tabs. Entries expire after
+    ``ttl_seconds`` and the least recently used ones are evicted once either
+    ``max_entries`` or ``max_bytes`` is exceeded.
+    """
+
+    def __init__(self, max_entries=256, ttl_seconds=300.0, max_bytes=64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # user_id -> (snapshot, size, stored_at)
+        self._loads = {}  # user_id -> [revision, loads in flight], only while a load is in flight
+        self._total_bytes = 0
+        self._lock = threading.RLock()
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            max_entries=int(os.getenv("USER_CACHE_MAX_ENTRIES", "256")),
+            ttl_seconds=float(os.getenv("USER_CACHE_TTL_SECONDS", "300")),
+            max_bytes=int(os.getenv("USER_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+        )
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def total_bytes(self):
+        return self._total_bytes
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            snapshot, _, stored_at = entry
+            if time.monotonic() - stored_at > self.ttl_seconds:
+                self._remove(user_id)
+                return None
+            self._entries.move_to_end(user_id)
+            return snapshot
+
+    @contextmanager
+    def loading(self, user_id):
+        """Wrap a load of the user's snapshot; yields the revision to pass to ``put``.
+
+        The revision changes whenever the user's data is stored, patched or invalidated,
+        cached or not. It is only tracked while a load is in flight: the entry is created
+        by the first ``loading`` and dropped when the last one exits, so memory follows
+        concurrent loads rather than every user ever seen. Once no load is in flight
+        there is no revision left to compare, so dropping it loses nothing.
+        """
+        with self._lock:
+            state = self._loads.setdefault(user_id, [0, 0])
+            state[1] += 1
+            revision = state[0]
+        try:
+            yield revision
+        finally:
+            with self._lock:
+                state[1] -= 1
+                if not state[1]:
+                    del self._loads[user_id]
+
+    def _bump(self, user_id):
+        state = self._loads.get(user_id)
+        if state is not None:
+            state[0] += 1
+
+    def put(self, user_id, snapshot, revision=None):
+        """Store a freshly loaded snapshot.
+
+        Pass the revision ``loading`` yielded and call this inside it: if the user was
+        written since, that write's patch found nothing to update and the snapshot may
+        predate it, so it is not stored.
+        """
+        size = estimate_size(snapshot)
+        with self._lock:
+            state = self._loads.get(user_id)
+            if revision is not None and state is not None and state[0] != revision:
+                return
+            self._bump(user_id)
+            self._remove(user_id)
+            if size > self.max_bytes:
+                return
+            self._entries[user_id] = (snapshot, size, time.monotonic())
+            self._total_bytes += size
+            self._evict()
+
+    def patch(self, user_id, apply):
+        """Apply ``apply(snapshot)`` to a cached entry in place; no-op if not cached."""
+        with self._lock:
+            self._bump(user_id)
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return
+            snapshot, size, stored_at = entry
+            try:
+                apply(snapshot)
+            except Exception:
+                # A patch that doesn't fit the cached data means the entry is stale
+                self._remove(user_id)
+                return
+            new_size = estimate_size(snapshot)
+            self._entries[user_id] = (snapshot, new_size, stored_at)
+            self._total_bytes += new_size - size
+            self._evict()
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._bump(user_id)
+            self._remove(user_id)
+
+    def clear(self):
+        with self._lock:
+            for user_id in self._entries:
+                self._bump(user_id)
+            self._entries.clear()
+            self._total_bytes = 0
+
+    def _remove(self, user_id):
+        entry = self._entries.pop(user_id, None)
+        if entry is not None:
+            self._total_bytes -= entry[1]
+
+    def _evict(self):
+        while self._entries and (len(self._entries) > self.max_entries or self._total_bytes > self.max_bytes):
+            _, (_, size, _) = self._entries.popitem(last=False)
+            self._total_bytes -= size